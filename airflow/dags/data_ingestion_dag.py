@@ -5,13 +5,18 @@ import sys
 import os
 import logging
 
+
 # Add the project root to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.append(project_root)
 
 # Import ingestion scripts
-from src.ingestion.ingest_corona import main as ingest_corona
-from src.ingestion.ingest_youtube import main as ingest_youtube
+from src.ingestion import ingest_corona, ingest_youtube
+from src.ingestion.catalog import refresh_statistics
+from src.ingestion.pipeline import connect_writer, drop_work_tables, load_staged, remove_staged
+from src.ingestion.publish import current_snapshot, publish
+from src.ingestion.schema import migrate_schemas
+from src.ingestion.summaries import has_changes, merge_changes, refresh_summaries
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,45 +45,144 @@ dag = DAG(
     tags=['data_lake', 'ingestion'],
 )
 
-# Task to ingest COVID-19 data
-def corona_ingestion_task():
+# Sources: (name, stage task id, parse function, merge function, post-merge step)
+SOURCES = [
+    ('COVID-19', 'stage_corona_data', ingest_corona.stage_corona_data, ingest_corona.apply_file, None),
+    ('YouTube', 'stage_youtube_data', ingest_youtube.stage_youtube_data, ingest_youtube.apply_file,
+     ingest_youtube.finalize),
+]
+
+# Parse changed files of one source into Parquet staging files (read-only on DuckDB)
+def staging_task(label, stage):
+    try:
+        logger.info(f"Starting {label} data staging")
+        staged = stage()
+        logger.info(f"{label} data staging completed: {len(staged['tasks'])} files parsed, "
+                    f"{staged['skipped']} unchanged files skipped")
+        return staged
+    except Exception as e:
+        logger.error(f"Error in {label} data staging: {str(e)}")
+        raise
+
+# Merge every staged file through a single DuckDB writer connection
+# Tables whose column types differ from their declared schema are converted first
+# Per-file stage timings go to the ingestion_runs table under the Airflow run id
+# The staged files are deleted only once every source is loaded, so retries find them
+# Returns the changed partitions per table for the summary refresh
+def load_task(ti):
+    con = connect_writer()
+    changes = {}
+    staged_sources = [ti.xcom_pull(task_ids=task_id) for _, task_id, _, _, _ in SOURCES]
+    try:
+        drop_work_tables(con)
+        for table_name in migrate_schemas(con):
+            merge_changes(changes, table_name, None)
+        for (label, _, _, apply_file, finalize), staged in zip(SOURCES, staged_sources):
+            summary = load_staged(con, staged, apply_file, finalize, run_id=ti.run_id)
+            for table_name, partitions in summary['changes'].items():
+                merge_changes(changes, table_name, partitions)
+            logger.info(
+                f"{label} data ingestion completed successfully: "
+                f"{summary['processed']} files processed, {summary['skipped']} unchanged files skipped"
+            )
+    except Exception as e:
+        logger.error(f"Error in data ingestion: {str(e)}")
+        raise
+    finally:
+        con.close()
+    remove_staged(staged_sources)
+    return changes
+
+# Recompute the dashboard summary tables for the partitions the load changed
+def summary_task(ti):
+    changes = ti.xcom_pull(task_ids='load_staged_data')
+    con = connect_writer()
+    try:
+        changes = refresh_summaries(con, changes or {})
+        logger.info("Summary tables refreshed")
+    except Exception as e:
+        logger.error(f"Error in summary refresh: {str(e)}")
+        raise
+    finally:
+        con.close()
+    return changes
+
+# Update the table statistics catalog of every table changed by the load or the summaries
+def statistics_task(ti):
+    changes = ti.xcom_pull(task_ids='refresh_summaries')
+    con = connect_writer()
     try:
-        logger.info("Starting COVID-19 data ingestion")
-        ingest_corona()
-        logger.info("COVID-19 data ingestion completed successfully")
+        refresh_statistics(con, changes or {})
+        logger.info("Table statistics refreshed")
     except Exception as e:
-        logger.error(f"Error in COVID-19 data ingestion: {str(e)}")
+        logger.error(f"Error in statistics refresh: {str(e)}")
         raise
+    finally:
+        con.close()
 
-# Task to ingest YouTube data
-def youtube_ingestion_task():
+# Copy the database into a new snapshot and point the dashboard at it
+# Runs where no file was merged keep the current snapshot
+def publish_task(ti):
+    changes = ti.xcom_pull(task_ids='refresh_summaries')
+    if not has_changes(changes) and current_snapshot() is not None:
+        logger.info("No changes to publish")
+        return
+    con = connect_writer()
     try:
-        logger.info("Starting YouTube data ingestion")
-        ingest_youtube()
-        logger.info("YouTube data ingestion completed successfully")
+        path = publish(con)
+        logger.info(f"Published snapshot {os.path.basename(path)}")
     except Exception as e:
-        logger.error(f"Error in YouTube data ingestion: {str(e)}")
+        logger.error(f"Error in snapshot publishing: {str(e)}")
         raise
+    finally:
+        con.close()
 
 # Define the tasks
-corona_task = PythonOperator(
-    task_id='ingest_corona_data',
-    python_callable=corona_ingestion_task,
+stage_tasks = [
+    PythonOperator(
+        task_id=task_id,
+        python_callable=staging_task,
+        op_kwargs={'label': label, 'stage': stage},
+        dag=dag,
+        retries=2,
+        retry_delay=timedelta(minutes=5),
+    )
+    for label, task_id, stage, _, _ in SOURCES
+]
+
+load = PythonOperator(
+    task_id='load_staged_data',
+    python_callable=load_task,
     dag=dag,
     retries=2,
     retry_delay=timedelta(minutes=5),
 )
 
-youtube_task = PythonOperator(
-    task_id='ingest_youtube_data',
-    python_callable=youtube_ingestion_task,
+summaries = PythonOperator(
+    task_id='refresh_summaries',
+    python_callable=summary_task,
     dag=dag,
     retries=2,
     retry_delay=timedelta(minutes=5),
 )
 
-# Set task dependencies
-# We can run them in parallel since they're independent
-corona_task >> youtube_task  # Run YouTube ingestion after COVID-19 ingestion
-# If you want them to run in parallel, remove the >> operator
+statistics = PythonOperator(
+    task_id='refresh_statistics',
+    python_callable=statistics_task,
+    dag=dag,
+    retries=2,
+    retry_delay=timedelta(minutes=5),
+)
 
+publish_snapshot = PythonOperator(
+    task_id='publish_snapshot',
+    python_callable=publish_task,
+    dag=dag,
+    retries=2,
+    retry_delay=timedelta(minutes=5),
+)
+
+# Set task dependencies
+# Parsing fans out per source; DuckDB allows a single writer, so one task merges everything
+# The dashboard only sees the load once the snapshot is published
+stage_tasks >> load >> summaries >> statistics >> publish_snapshot
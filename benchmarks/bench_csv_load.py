@@ -0,0 +1,84 @@
+"""Compare the native DuckDB and pandas CSV ingestion paths.
+
+Each mode runs in its own subprocess so that peak RSS is measured per mode:
+
+    python benchmarks/bench_csv_load.py --rows 500000
+    python benchmarks/bench_csv_load.py --csv data/corona/usa_county_wise.csv
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from synthetic import write_videos_csv
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_worker(mode, csv_path):
+    import duckdb
+    from src.ingestion.csv_loader import load_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        con = duckdb.connect(os.path.join(tmp, 'bench.duckdb'))
+        start = time.perf_counter()
+        rows = load_csv(con, csv_path, 'bench_table', encodings=('utf-8', 'latin1'), mode=mode)
+        elapsed = time.perf_counter() - start
+        con.close()
+    print(json.dumps({'mode': mode, 'rows': rows, 'seconds': elapsed, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def run_mode(mode, csv_path):
+    out = subprocess.run(
+        [sys.executable, __file__, '--worker', mode, '--csv', csv_path],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', help='CSV file to load (a synthetic file is generated if omitted)')
+    parser.add_argument('--rows', type=int, default=200_000, help='rows in the synthetic file')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per mode, the best is reported')
+    parser.add_argument('--worker', choices=['native', 'pandas'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.csv)
+        return
+
+    tmp_dir = None
+    csv_path = args.csv
+    if csv_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(tmp_dir.name, 'synthetic.csv')
+        write_videos_csv(csv_path, args.rows)
+
+    size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+    print(f"File: {csv_path} ({size_mb:.1f} MB)")
+    print(f"{'mode':<8} {'rows':>10} {'best s':>9} {'peak RSS MB':>12}")
+    for mode in ('pandas', 'native'):
+        runs = [run_mode(mode, csv_path) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r['seconds'])
+        peak = max(r['peak_rss_mb'] for r in runs)
+        print(f"{mode:<8} {best['rows']:>10,} {best['seconds']:>9.2f} {peak:>12.1f}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
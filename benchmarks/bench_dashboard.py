@@ -0,0 +1,201 @@
+"""Benchmark the dashboard's time to first render and its reruns, page by page.
+
+Every page is measured in fresh processes that run the Streamlit app headless
+(`streamlit.testing`): startup is the time from importing Streamlit to the
+first render of the default page, first_view the run that opens the page
+(its module, imports and queries all cold), and rerun the median of reruns
+of the page once its results are cached; the modules loaded at startup and
+after the first view show what each page imports. The data is a synthetic scale
+ingested into a temporary workspace, or an existing database with --db.
+Results go to a JSON file that a later run can be compared with:
+
+    python benchmarks/bench_dashboard.py --scale 1
+    python benchmarks/bench_dashboard.py --db minilake.duckdb --compare benchmarks/results/dashboard-<timestamp>.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+APP_PATH = os.path.join(project_root, 'src', 'visualization', 'app.py')
+PAGES = ["Data Overview", "Table Explorer", "YouTube Analysis", "Corona Analysis", "Control Panel", "Performance"]
+RESULTS_DIR = os.path.join(project_root, 'benchmarks', 'results')
+
+
+def run_worker(page, reruns):
+    """Open `page` in a fresh app session and print the timings.
+
+    Nothing but the standard library is imported before the clock starts.
+    """
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    run_start = time.perf_counter()
+    at.run()
+    startup = time.perf_counter() - start
+    modules = len(sys.modules)
+    if page == PAGES[0]:
+        first_view = time.perf_counter() - run_start
+    else:
+        run_start = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        first_view = time.perf_counter() - run_start
+    errors = [str(e.value) for e in at.exception]
+
+    rerun_seconds = []
+    for _ in range(reruns):
+        run_start = time.perf_counter()
+        at.run()
+        rerun_seconds.append(time.perf_counter() - run_start)
+    print(json.dumps({
+        'startup_seconds': startup,
+        'first_view_seconds': first_view,
+        'rerun_seconds': statistics.median(rerun_seconds) if rerun_seconds else None,
+        'modules_at_startup': modules,
+        'modules_after_view': len(sys.modules),
+        'errors': errors,
+    }))
+
+
+def measure_page(page, workspace, reruns):
+    env = dict(
+        os.environ,
+        MINILAKE_DB_PATH=workspace['db_path'],
+        MINILAKE_LAKE_DIR=workspace['lake_dir'],
+        MINILAKE_PUBLISHED_DIR=workspace['published_dir'],
+        # First views measure cold queries, not a race with the cache warm-up
+        MINILAKE_PREFETCH_SECONDS=os.environ.get('MINILAKE_PREFETCH_SECONDS', '0'),
+    )
+    out = subprocess.run(
+        [sys.executable, __file__, '--worker', page, '--reruns', str(reruns)],
+        check=True, capture_output=True, text=True, env=env,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_pages(pages, workspace, repeat, reruns):
+    """Median of `repeat` fresh-process measurements of every page."""
+    results = []
+    for page in pages:
+        runs = [measure_page(page, workspace, reruns) for _ in range(repeat)]
+        result = {
+            'page': page,
+            **{key: statistics.median(run[key] for run in runs)
+               for key in ('startup_seconds', 'first_view_seconds', 'rerun_seconds')},
+            'modules_at_startup': runs[0]['modules_at_startup'],
+            'modules_after_view': runs[0]['modules_after_view'],
+            'errors': runs[0]['errors'],
+        }
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def print_header():
+    print(f"{'page':<18} {'startup s':>10} {'first view s':>13} {'rerun s':>9} {'modules':>15}")
+
+
+def print_result(result, previous=None):
+    line = (
+        f"{result['page']:<18} {result['startup_seconds']:>10.3f} {result['first_view_seconds']:>13.3f} "
+        f"{result['rerun_seconds']:>9.3f} {result['modules_at_startup']:>7}/{result['modules_after_view']:<7}"
+    )
+    if previous is not None:
+        line += (f"   {result['startup_seconds'] / previous['startup_seconds']:.2f}x startup, "
+                 f"{result['first_view_seconds'] / previous['first_view_seconds']:.2f}x first view vs previous")
+    if result['errors']:
+        line += f"   errors: {'; '.join(result['errors'])}"
+    print(line, flush=True)
+
+
+def compare(results, previous_path):
+    """Print each result next to the same page of a previous results file."""
+    with open(previous_path) as f:
+        previous = {r['page']: r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path}:")
+    print_header()
+    for result in results:
+        print_result(result, previous.get(result['page']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1, help='synthetic data scale (ignored with --db)')
+    parser.add_argument('--db', help='existing database to read instead of synthetic data')
+    parser.add_argument('--pages', nargs='+', default=PAGES, choices=PAGES, metavar='PAGE', help='pages to measure')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh processes per page (the median is kept)')
+    parser.add_argument('--reruns', type=int, default=5, help='warm reruns per process')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/dashboard-<timestamp>.json)')
+    parser.add_argument('--compare', help='previous results file to compare with')
+    parser.add_argument('--workdir', help='directory for the synthetic data and database (default: system temp)')
+    parser.add_argument('--worker', metavar='PAGE', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.reruns)
+        return
+
+    import duckdb
+    from bench_ingestion import git_commit, run_ingestion
+    from synthetic import write_dataset
+
+    with tempfile.TemporaryDirectory(prefix='minilake_bench_dashboard_', dir=args.workdir) as tmp:
+        if args.db:
+            db_path = os.path.abspath(args.db)
+            workspace = {
+                'db_path': db_path,
+                'lake_dir': os.environ.get('MINILAKE_LAKE_DIR', os.path.join(os.path.dirname(db_path), 'lake')),
+                'published_dir': os.environ.get(
+                    'MINILAKE_PUBLISHED_DIR', os.path.join(os.path.dirname(db_path), 'published')
+                ),
+            }
+        else:
+            workspace = {
+                'data_dir': os.path.join(tmp, 'data'),
+                'db_path': os.path.join(tmp, 'minilake.duckdb'),
+                'lake_dir': os.path.join(tmp, 'lake'),
+                'published_dir': os.path.join(tmp, 'published'),
+            }
+            write_dataset(workspace['data_dir'], args.scale)
+            run_ingestion(workspace)
+        print_header()
+        results = run_pages(args.pages, workspace, args.repeat, args.reruns)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        output = os.path.join(RESULTS_DIR, f'dashboard-{stamp}.json')
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'duckdb': duckdb.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': None if args.db else args.scale,
+            'db': args.db,
+            'repeat': args.repeat,
+            'reruns': args.reruns,
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""Benchmark whole ingestion runs on synthetic COVID-19 and YouTube sources.
+
+For every scale a fresh data directory, database and lake go through four
+scenarios in order: first_load (empty database), no_change (same files
+again), small_delta (one new day appended everywhere, a few snapshot rows
+revised) and all_duplicates (every file rewritten with its rows reordered,
+so everything is parsed but nothing is new). Each ingestion runs in its own
+subprocess to measure its peak RSS. Results go to a JSON file that a later
+run can be compared with:
+
+    python benchmarks/bench_ingestion.py --scales 1 10
+    python benchmarks/bench_ingestion.py --scales 1 --compare benchmarks/results/ingestion-<timestamp>.json
+
+Scale 100 writes about 20 GB of CSV files; use --workdir to put them on a
+large enough disk.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from synthetic import append_delta, count_rows, expected_dates, rewrite_as_duplicates, write_dataset
+
+SCENARIOS = ['first_load', 'no_change', 'small_delta', 'all_duplicates']
+RESULTS_DIR = os.path.join(project_root, 'benchmarks', 'results')
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def path_bytes(path):
+    """Size of a file, or of every file below a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, fname))
+        for root, _, files in os.walk(path) for fname in files
+    )
+
+
+def db_bytes(db_path):
+    return sum(path_bytes(path) for path in (db_path, f'{db_path}.wal') if os.path.exists(path))
+
+
+def run_worker():
+    """Ingest both sources into the database named by the environment and print the timings."""
+    import duckdb
+    from src.ingestion import ingest_corona, ingest_youtube
+    from src.ingestion.manifest import MANIFEST_TABLE
+    from src.ingestion.paths import DB_PATH
+
+    started_at = datetime.now()
+    start = time.perf_counter()
+    corona = ingest_corona.main()
+    corona_seconds = time.perf_counter() - start
+    youtube = ingest_youtube.main()
+    seconds = time.perf_counter() - start
+
+    con = duckdb.connect(DB_PATH, read_only=True)
+    try:
+        rows = con.execute(
+            f"SELECT COALESCE(SUM(rows_in), 0) FROM {MANIFEST_TABLE} WHERE ingested_at >= ?", [started_at]
+        ).fetchone()[0]
+    finally:
+        con.close()
+    print(json.dumps({
+        'seconds': seconds,
+        'corona_seconds': corona_seconds,
+        'youtube_seconds': seconds - corona_seconds,
+        'rows': int(rows),
+        'files_processed': corona['processed'] + youtube['processed'],
+        'files_skipped': corona['skipped'] + youtube['skipped'],
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def run_ingestion(workspace):
+    env = dict(
+        os.environ,
+        MINILAKE_DATA_DIR=workspace['data_dir'],
+        MINILAKE_DB_PATH=workspace['db_path'],
+        MINILAKE_LAKE_DIR=workspace['lake_dir'],
+    )
+    out = subprocess.run(
+        [sys.executable, __file__, '--worker'],
+        check=True, capture_output=True, text=True, env=env,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def check_load(scenario, workspace, scale):
+    """Check what a scenario loaded; raises with every problem found.
+
+    The dates of every date-keyed table (and of its lake partitions) must be
+    those of the synthetic files, whose formats include m/d/yy and yy.dd.mm,
+    and a small delta must be applied incrementally, parsing only the
+    appended rows of the date-keyed COVID-19 files.
+    """
+    import duckdb
+    from src.ingestion.incremental import WATERMARK_COLUMNS
+    from src.ingestion.lake import lake_layout
+    from src.ingestion.manifest import MANIFEST_TABLE
+
+    problems = []
+    con = duckdb.connect(workspace['db_path'], read_only=True)
+    try:
+        for table_name, expected in expected_dates(workspace['data_dir'], scale).items():
+            column = WATERMARK_COLUMNS.get(table_name, 'trending_date')
+            loaded = con.execute(f'SELECT MIN("{column}"), MAX("{column}") FROM {table_name}').fetchone()
+            if tuple(loaded) != expected:
+                problems.append(f'{table_name} {column} spans {loaded[0]} to {loaded[1]}, not {expected}')
+            if table_name in WATERMARK_COLUMNS:
+                dataset_dir = os.path.join(workspace['lake_dir'], lake_layout(table_name)['dataset'])
+                partitions = sorted(name[len('date='):] for name in os.listdir(dataset_dir) if name.startswith('date='))
+                if (partitions[0], partitions[-1]) != tuple(day.isoformat() for day in expected):
+                    problems.append(f'lake partitions of {table_name} span {partitions[0]} to {partitions[-1]}')
+        if scenario == 'small_delta':
+            source_rows = count_rows(workspace['data_dir'])
+            for table_name in WATERMARK_COLUMNS:
+                rows_in = con.execute(
+                    f"SELECT rows_in FROM {MANIFEST_TABLE} WHERE table_name = ?", [table_name]
+                ).fetchone()[0]
+                if rows_in >= source_rows[os.path.join('corona', f'{table_name}.csv')]:
+                    problems.append(f'{table_name} was fully reloaded ({rows_in:,} rows) instead of appended to')
+    finally:
+        con.close()
+    if problems:
+        raise RuntimeError(f'{scenario} at scale {scale}: ' + '; '.join(problems))
+
+
+def prepare(scenario, workspace, scale):
+    if scenario == 'first_load':
+        write_dataset(workspace['data_dir'], scale)
+    elif scenario == 'small_delta':
+        append_delta(workspace['data_dir'], scale)
+    elif scenario == 'all_duplicates':
+        rewrite_as_duplicates(workspace['data_dir'])
+
+
+def run_scale(scale, workdir):
+    """Run every scenario on a fresh workspace and return one result per scenario."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix=f'minilake_bench_x{scale}_', dir=workdir) as tmp:
+        workspace = {
+            'data_dir': os.path.join(tmp, 'data'),
+            'db_path': os.path.join(tmp, 'minilake.duckdb'),
+            'lake_dir': os.path.join(tmp, 'lake'),
+        }
+        for scenario in SCENARIOS:
+            start = time.perf_counter()
+            prepare(scenario, workspace, scale)
+            prepare_seconds = time.perf_counter() - start
+            source_rows = sum(count_rows(workspace['data_dir']).values())
+            before = db_bytes(workspace['db_path'])
+            run = run_ingestion(workspace)
+            check_load(scenario, workspace, scale)
+            after = db_bytes(workspace['db_path'])
+            result = dict(
+                run,
+                scale=scale,
+                scenario=scenario,
+                source_rows=source_rows,
+                source_bytes=path_bytes(workspace['data_dir']),
+                rows_per_second=run['rows'] / run['seconds'] if run['seconds'] else 0.0,
+                db_bytes_before=before,
+                db_bytes_after=after,
+                db_growth_bytes=after - before,
+                lake_bytes=path_bytes(workspace['lake_dir']) if os.path.isdir(workspace['lake_dir']) else 0,
+                prepare_seconds=prepare_seconds,
+            )
+            print_result(result)
+            results.append(result)
+    return results
+
+
+def print_header():
+    print(f"{'scale':>5} {'scenario':<15} {'rows':>12} {'seconds':>9} {'rows/s':>12} "
+          f"{'peak RSS MB':>12} {'DB growth MB':>13}")
+
+
+def print_result(result, previous=None):
+    line = (
+        f"{result['scale']:>4}x {result['scenario']:<15} {result['rows']:>12,} {result['seconds']:>9.2f} "
+        f"{result['rows_per_second']:>12,.0f} {result['peak_rss_mb']:>12.1f} "
+        f"{result['db_growth_bytes'] / 1024 ** 2:>13.1f}"
+    )
+    if previous is not None:
+        line += f"   {result['seconds'] / previous['seconds']:.2f}x time vs previous" if previous['seconds'] else ''
+    print(line, flush=True)
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    """Print each result next to the same scale and scenario of a previous results file."""
+    with open(previous_path) as f:
+        previous = {(r['scale'], r['scenario']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path}:")
+    print_header()
+    for result in results:
+        print_result(result, previous.get((result['scale'], result['scenario'])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1], help='data scales to run, e.g. 1 10 100')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/ingestion-<timestamp>.json)')
+    parser.add_argument('--compare', help='previous results file to compare with')
+    parser.add_argument('--workdir', help='directory for the synthetic data and databases (default: system temp)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker()
+        return
+
+    import duckdb
+
+    print_header()
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(scale, args.workdir))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        output = os.path.join(RESULTS_DIR, f'ingestion-{stamp}.json')
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'duckdb': duckdb.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'ingest_workers': os.environ.get('MINILAKE_INGEST_WORKERS'),
+            'ingest_mode': os.environ.get('MINILAKE_INGEST_MODE', 'native'),
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Compare the delta merge with the previous UNION ALL + NOT EXISTS table rebuild.
+
+A fixed-size batch (half updates, half new keys, all on the latest dates) is
+merged into tables of growing size. With the table clustered by date the
+merge only reads the row groups of those dates and its time stays flat while
+the rebuild grows; `--cluster country` orders the table by country, then
+date, like the COVID-19 tables, where the merge still scans the key columns
+of every row group:
+
+    python benchmarks/bench_merge.py --base-rows 200000 --delta-rows 5000
+    python benchmarks/bench_merge.py --cluster country --skip-legacy
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import duckdb
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.ingestion.merge import merge_table
+
+KEY_COLUMNS = ['Date', 'Country/Region']
+COUNTRIES = 200
+
+
+def create_target(con, rows, cluster='date'):
+    con.execute(f"""
+        CREATE OR REPLACE TABLE target AS
+        SELECT
+            DATE '2020-01-01' + CAST(i // {COUNTRIES} AS INTEGER) AS "Date",
+            'Country ' || CAST(i % {COUNTRIES} AS VARCHAR) AS "Country/Region",
+            CAST(i AS BIGINT) AS "Confirmed",
+            CAST(i // 10 AS BIGINT) AS "Deaths",
+            'Europe' AS "WHO Region"
+        FROM range({rows}) t(i)
+    """)
+    if cluster == 'country':
+        con.execute('CREATE OR REPLACE TABLE target AS SELECT * FROM target ORDER BY "Country/Region", "Date"')
+
+
+def create_staging(con, target_rows, delta_rows):
+    # First half overwrites the latest keys with new values, second half appends new keys
+    first = target_rows - delta_rows // 2
+    con.execute(f"""
+        CREATE OR REPLACE TABLE target_temp AS
+        SELECT
+            DATE '2020-01-01' + CAST(i // {COUNTRIES} AS INTEGER) AS "Date",
+            'Country ' || CAST(i % {COUNTRIES} AS VARCHAR) AS "Country/Region",
+            CAST(i + 1 AS BIGINT) AS "Confirmed",
+            CAST(i // 10 AS BIGINT) AS "Deaths",
+            'Europe' AS "WHO Region"
+        FROM range({first}, {first + delta_rows}) t(i)
+    """)
+
+
+def legacy_rebuild(con):
+    pk_conditions = ' AND '.join(f't1."{col}" = t2."{col}"' for col in KEY_COLUMNS)
+    # Newer DuckDB releases no longer expose rowid on a UNION subquery, so the
+    # union is materialized first; the cost profile of the rebuild is unchanged.
+    con.execute("CREATE OR REPLACE TEMP TABLE target_union AS SELECT * FROM target UNION ALL SELECT * FROM target_temp")
+    con.execute(f"""
+        CREATE OR REPLACE TABLE target_new AS
+        SELECT DISTINCT *
+        FROM target_union t1
+        WHERE NOT EXISTS (
+            SELECT 1 FROM target_temp t2
+            WHERE {pk_conditions}
+            AND t1.rowid > t2.rowid
+        )
+    """)
+    con.execute("DROP TABLE target")
+    con.execute("ALTER TABLE target_new RENAME TO target")
+    con.execute("DROP TABLE IF EXISTS target_temp")
+
+
+def delta_merge(con):
+    merge_table(con, 'target', 'target_temp', KEY_COLUMNS)
+
+
+def time_strategy(strategy, rows, delta_rows, repeat, cluster='date'):
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            con = duckdb.connect(os.path.join(tmp, 'bench.duckdb'))
+            create_target(con, rows, cluster)
+            create_staging(con, rows, delta_rows)
+            start = time.perf_counter()
+            strategy(con)
+            elapsed = time.perf_counter() - start
+            con.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-rows', type=int, default=100_000, help='size of the smallest existing table')
+    parser.add_argument('--delta-rows', type=int, default=5_000, help='rows in each incoming batch')
+    parser.add_argument('--steps', type=int, default=3, help='number of 10x growth steps')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per size, the best is reported')
+    parser.add_argument('--cluster', choices=['date', 'country'], default='date',
+                        help='physical order of the existing table')
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the delta merge')
+    args = parser.parse_args()
+
+    print(f"Delta batch: {args.delta_rows:,} rows, table clustered by {args.cluster}")
+    print(f"{'table rows':>12} {'merge s':>10} {'rebuild s':>12}")
+    for step in range(args.steps):
+        rows = args.base_rows * 10 ** step
+        merge_s = time_strategy(delta_merge, rows, args.delta_rows, args.repeat, args.cluster)
+        rebuild_s = '-' if args.skip_legacy else time_strategy(
+            legacy_rebuild, rows, args.delta_rows, args.repeat, args.cluster
+        )
+        rebuild_s = rebuild_s if isinstance(rebuild_s, str) else f"{rebuild_s:.3f}"
+        print(f"{rows:>12,} {merge_s:>10.3f} {rebuild_s:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""Synthetic COVID-19 and YouTube source files matching the real schemas.
+
+Scale 1 has roughly the row counts of the Kaggle datasets the project was
+built for (about 750k COVID-19 rows and 400k YouTube rows); scale N multiplies
+the number of countries, locations, counties and videos by N. Files are
+written by DuckDB from `range()` with hash-based values, so even scale 100
+is generated in seconds and every run produces the same bytes:
+
+    python benchmarks/synthetic.py /tmp/minilake_data --scale 10
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+import sys
+
+import duckdb
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.ingestion.csv_loader import sql_literal
+
+START_DATE = '2020-01-22'
+BASE_DAYS = 188
+BASE_COUNTRIES = 187
+BASE_LOCATIONS = 261
+BASE_COUNTIES = 3340
+WHO_REGIONS = ['Africa', 'Americas', 'Eastern Mediterranean', 'Europe', 'South-East Asia', 'Western Pacific']
+
+YOUTUBE_COUNTRIES = ['CA', 'DE', 'FR', 'GB', 'IN', 'JP', 'KR', 'MX', 'RU', 'US']
+YOUTUBE_START_DATE = '2017-11-14'
+# Each video is trending on every day of the file: videos x days rows per country
+BASE_VIDEOS = 200
+BASE_TRENDING_DAYS = 200
+CATEGORIES = {1: 'Film & Animation', 10: 'Music', 17: 'Sports', 20: 'Gaming', 22: 'People & Blogs',
+              23: 'Comedy', 24: 'Entertainment', 25: 'News & Politics', 26: 'Howto & Style', 28: 'Science & Technology'}
+
+SEED = 42
+
+
+def _rand(expression, modulo, salt):
+    """Deterministic pseudo-random integer in [0, modulo) derived from `expression`."""
+    return f"CAST(hash({expression}, {SEED + salt}) % {modulo} AS BIGINT)"
+
+
+def _region(expression):
+    regions = ', '.join(sql_literal(region) for region in WHO_REGIONS)
+    return f"[{regions}][{expression} % {len(WHO_REGIONS)} + 1]"
+
+
+def _cumulative(day, entity, factor, salt):
+    # Grows with the day so that later dates have larger totals, like the real files
+    return f"CAST(({day} + 1) * ({_rand(entity, 50, salt)} + 1) * {factor} AS BIGINT)"
+
+
+def corona_queries(scale, first_day=0, last_day=BASE_DAYS, revision=0):
+    """SELECT statements producing each COVID-19 file for days [first_day, last_day).
+
+    `revision` changes a few values of the snapshot files (country_wise_latest,
+    worldometer_data), as a daily update of the source would.
+    """
+    countries = BASE_COUNTRIES * scale
+    locations = BASE_LOCATIONS * scale
+    counties = BASE_COUNTIES * scale
+    days = f"range({first_day}, {last_day}) d(day)"
+    date = f"DATE '{START_DATE}' + CAST(day AS INTEGER)"
+    revised = f"(CASE WHEN c % 100 = 0 THEN {revision} ELSE 0 END)"
+    return {
+        'day_wise.csv': f"""
+            SELECT
+                {date} AS "Date",
+                {_cumulative('day', 0, 1000 * scale, 1)} AS "Confirmed",
+                {_cumulative('day', 0, 30 * scale, 2)} AS "Deaths",
+                {_cumulative('day', 0, 500 * scale, 3)} AS "Recovered",
+                {_cumulative('day', 0, 470 * scale, 4)} AS "Active",
+                {_rand('day', 10000 * scale, 5)} AS "New cases",
+                {_rand('day', 300 * scale, 6)} AS "New deaths",
+                {_rand('day', 5000 * scale, 7)} AS "New recovered",
+                round({_rand('day', 1000, 8)} / 100, 2) AS "Deaths / 100 Cases",
+                round({_rand('day', 10000, 9)} / 100, 2) AS "Recovered / 100 Cases",
+                round({_rand('day', 2000, 10)} / 100, 2) AS "Deaths / 100 Recovered",
+                {countries} AS "No. of countries"
+            FROM {days}
+            ORDER BY day
+        """,
+        'full_grouped.csv': f"""
+            SELECT
+                {date} AS "Date",
+                'Country ' || c AS "Country/Region",
+                {_cumulative('day', 'c', 10, 1)} AS "Confirmed",
+                {_cumulative('day', 'c', 1, 2)} AS "Deaths",
+                {_cumulative('day', 'c', 5, 3)} AS "Recovered",
+                {_cumulative('day', 'c', 4, 4)} AS "Active",
+                {_rand('day * 100003 + c', 1000, 5)} AS "New cases",
+                {_rand('day * 100003 + c', 30, 6)} AS "New deaths",
+                {_rand('day * 100003 + c', 500, 7)} AS "New recovered",
+                {_region('c')} AS "WHO Region"
+            FROM {days}, range({countries}) t(c)
+            ORDER BY day, c
+        """,
+        'covid_19_clean_complete.csv': f"""
+            SELECT
+                CASE WHEN l >= {countries} THEN 'Province ' || l END AS "Province/State",
+                'Country ' || (l % {countries}) AS "Country/Region",
+                round({_rand('l', 18000, 11)} / 100 - 90, 4) AS "Lat",
+                round({_rand('l', 36000, 12)} / 100 - 180, 4) AS "Long",
+                {date} AS "Date",
+                {_cumulative('day', 'l', 10, 1)} AS "Confirmed",
+                {_cumulative('day', 'l', 1, 2)} AS "Deaths",
+                {_cumulative('day', 'l', 5, 3)} AS "Recovered",
+                {_cumulative('day', 'l', 4, 4)} AS "Active",
+                {_region('l % ' + str(countries))} AS "WHO Region"
+            FROM {days}, range({locations}) t(l)
+            ORDER BY day, l
+        """,
+        'usa_county_wise.csv': f"""
+            SELECT
+                84000000 + k AS "UID",
+                'US' AS "iso2",
+                'USA' AS "iso3",
+                840 AS "code3",
+                CAST(1000 + k AS DOUBLE) AS "FIPS",
+                'County ' || k AS "Admin2",
+                'State ' || (k % 58) AS "Province_State",
+                'US' AS "Country_Region",
+                round({_rand('k', 2500, 13)} / 100 + 24, 6) AS "Lat",
+                round({_rand('k', 5800, 14)} / 100 - 125, 6) AS "Long_",
+                'County ' || k || ', State ' || (k % 58) || ', US' AS "Combined_Key",
+                strftime({date}, '%-m/%-d/%y') AS "Date",
+                {_cumulative('day', 'k', 2, 1)} AS "Confirmed",
+                {_cumulative('day', 'k', 0.1, 2)} AS "Deaths"
+            FROM {days}, range({counties}) t(k)
+            ORDER BY day, k
+        """,
+        'country_wise_latest.csv': f"""
+            SELECT
+                'Country ' || c AS "Country/Region",
+                {_cumulative(last_day, 'c', 10, 1)} + {revised} AS "Confirmed",
+                {_cumulative(last_day, 'c', 1, 2)} AS "Deaths",
+                {_cumulative(last_day, 'c', 5, 3)} AS "Recovered",
+                {_cumulative(last_day, 'c', 4, 4)} + {revised} AS "Active",
+                {_rand('c', 1000, 5)} AS "New cases",
+                {_rand('c', 30, 6)} AS "New deaths",
+                {_rand('c', 500, 7)} AS "New recovered",
+                round({_rand('c', 1000, 8)} / 100, 2) AS "Deaths / 100 Cases",
+                round({_rand('c', 10000, 9)} / 100, 2) AS "Recovered / 100 Cases",
+                round({_rand('c', 2000, 10)} / 100, 2) AS "Deaths / 100 Recovered",
+                {_cumulative(last_day - 7, 'c', 10, 1)} AS "Confirmed last week",
+                {_rand('c', 5000, 15)} AS "1 week change",
+                round({_rand('c', 5000, 16)} / 100, 2) AS "1 week % increase",
+                {_region('c')} AS "WHO Region"
+            FROM range({countries}) t(c)
+        """,
+        'worldometer_data.csv': f"""
+            SELECT
+                'Country ' || c AS "Country/Region",
+                ['Africa', 'Asia', 'Europe', 'North America', 'Oceania', 'South America'][c % 6 + 1] AS "Continent",
+                {_rand('c', 300_000_000, 17)} + 10000 AS "Population",
+                {_cumulative(last_day, 'c', 10, 1)} + {revised} AS "TotalCases",
+                {_rand('c', 1000, 5)} AS "NewCases",
+                {_cumulative(last_day, 'c', 1, 2)} AS "TotalDeaths",
+                {_rand('c', 30, 6)} AS "NewDeaths",
+                {_cumulative(last_day, 'c', 5, 3)} AS "TotalRecovered",
+                {_rand('c', 500, 7)} AS "NewRecovered",
+                {_cumulative(last_day, 'c', 4, 4)} + {revised} AS "ActiveCases",
+                {_rand('c', 2000, 18)} AS "Serious,Critical",
+                {_rand('c', 20000, 19)} AS "Tot Cases/1M pop",
+                {_rand('c', 800, 20)} AS "Deaths/1M pop",
+                {_rand('c', 50_000_000, 21)} AS "TotalTests",
+                {_rand('c', 200000, 22)} AS "Tests/1M pop",
+                {_region('c')} AS "WHO Region"
+            FROM range({countries}) t(c)
+        """,
+    }
+
+
+def videos_query(country, scale, first_day=0, last_day=BASE_TRENDING_DAYS):
+    """SELECT statement producing a `<country>videos.csv` file for trending days [first_day, last_day)."""
+    videos = BASE_VIDEOS * scale
+    categories = ', '.join(str(category) for category in CATEGORIES)
+    salt = YOUTUBE_COUNTRIES.index(country) * 100
+    return f"""
+        SELECT
+            printf('{country}%09d', v) AS video_id,
+            strftime(DATE '{YOUTUBE_START_DATE}' + CAST(day AS INTEGER), '%y.%d.%m') AS trending_date,
+            'Video title ' || v || ' ' || repeat('x', {_rand('v', 60, salt + 1)}) AS title,
+            'Channel ' || {_rand('v', 50 * scale + 1, salt + 2)} AS channel_title,
+            [{categories}][{_rand('v', len(CATEGORIES), salt + 3)} + 1] AS category_id,
+            strftime(TIMESTAMP '{YOUTUBE_START_DATE}' - INTERVAL (({_rand('v', 400, salt + 4)})) DAY,
+                     '%Y-%m-%dT%H:%M:%S.000Z') AS publish_time,
+            '"tag1"|"tag2"|"tag3"' AS tags,
+            {_rand('v', 10_000_000, salt + 5)} + day * 1000 AS views,
+            {_rand('v', 100_000, salt + 6)} + day * 10 AS likes,
+            {_rand('v', 10_000, salt + 7)} AS dislikes,
+            {_rand('v', 50_000, salt + 8)} + day AS comment_count,
+            'https://i.ytimg.com/vi/' || printf('{country}%09d', v) || '/default.jpg' AS thumbnail_link,
+            false AS comments_disabled,
+            false AS ratings_disabled,
+            false AS video_error_or_removed,
+            'Description line one\\nline two ' || repeat('y', {_rand('v', 200, salt + 9)}) AS description
+        FROM range({first_day}, {last_day}) d(day), range({videos}) t(v)
+        ORDER BY day, v
+    """
+
+
+def _copy(con, query, path, header=True):
+    con.execute(f"COPY ({query}) TO {sql_literal(path)} (FORMAT CSV, HEADER {str(header).lower()})")
+
+
+def _append(con, query, path):
+    """Append the rows of `query` (without a header) to an existing CSV file."""
+    tmp_path = f"{path}.append"
+    _copy(con, query, tmp_path, header=False)
+    with open(tmp_path, 'rb') as src, open(path, 'ab') as dst:
+        for chunk in iter(lambda: src.read(4 * 1024 * 1024), b''):
+            dst.write(chunk)
+    os.remove(tmp_path)
+
+
+def write_dataset(data_dir, scale=1, countries=YOUTUBE_COUNTRIES):
+    """Write the corona/ and youtube/ source directories; returns the row count per file."""
+    corona_dir = os.path.join(data_dir, 'corona')
+    youtube_dir = os.path.join(data_dir, 'youtube')
+    os.makedirs(corona_dir, exist_ok=True)
+    os.makedirs(youtube_dir, exist_ok=True)
+    con = duckdb.connect()
+    try:
+        for fname, query in corona_queries(scale).items():
+            _copy(con, query, os.path.join(corona_dir, fname))
+        for country in countries:
+            _copy(con, videos_query(country, scale), os.path.join(youtube_dir, f'{country}videos.csv'))
+            items = [
+                {'id': str(category), 'snippet': {'title': title, 'assignable': True, 'channelId': 'x'}}
+                for category, title in CATEGORIES.items()
+            ]
+            with open(os.path.join(youtube_dir, f'{country}_category_id.json'), 'w', encoding='utf-8') as f:
+                json.dump({'kind': 'youtube#videoCategoryListResponse', 'items': items}, f)
+    finally:
+        con.close()
+    return count_rows(data_dir)
+
+
+def append_delta(data_dir, scale=1, days=1, revision=1):
+    """Simulate the next update of the sources.
+
+    Appends `days` new dates to the date-keyed COVID-19 files and `days` new
+    trending days to every YouTube file, and revises a few rows of the
+    snapshot files.
+    """
+    corona_dir = os.path.join(data_dir, 'corona')
+    youtube_dir = os.path.join(data_dir, 'youtube')
+    con = duckdb.connect()
+    try:
+        loaded_days = _loaded_days(corona_dir)
+        queries = corona_queries(scale, loaded_days, loaded_days + days, revision)
+        for fname, query in queries.items():
+            path = os.path.join(corona_dir, fname)
+            if fname in ('country_wise_latest.csv', 'worldometer_data.csv'):
+                _copy(con, query, path)
+            else:
+                _append(con, query, path)
+        for fname in sorted(os.listdir(youtube_dir)):
+            if fname.endswith('videos.csv'):
+                country = fname[:-len('videos.csv')]
+                trending_days = _line_count(os.path.join(youtube_dir, fname)) // (BASE_VIDEOS * scale)
+                _append(con, videos_query(country, scale, trending_days, trending_days + days),
+                        os.path.join(youtube_dir, fname))
+    finally:
+        con.close()
+
+
+def rewrite_as_duplicates(data_dir):
+    """Rewrite every CSV file with the same rows in another order.
+
+    The files change on disk, so nothing can be skipped from the manifest,
+    but every row is already in the database.
+    """
+    con = duckdb.connect()
+    try:
+        con.execute("SELECT setseed(0.42)")
+        for root, _, files in os.walk(data_dir):
+            for fname in sorted(files):
+                if not fname.endswith('.csv'):
+                    continue
+                path = os.path.join(root, fname)
+                _copy(con, f"""
+                    SELECT * FROM read_csv({sql_literal(path)}, header = true, all_varchar = true)
+                    ORDER BY random()
+                """, f"{path}.shuffled")
+                os.replace(f"{path}.shuffled", path)
+    finally:
+        con.close()
+
+
+def _line_count(path):
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(4 * 1024 * 1024), b'')) - 1
+
+
+def _loaded_days(corona_dir):
+    return _line_count(os.path.join(corona_dir, 'day_wise.csv'))
+
+
+def expected_dates(data_dir, scale=1):
+    """(first, last) date of the rows of every date-keyed table loaded from `data_dir`."""
+    first = datetime.date.fromisoformat(START_DATE)
+    last = first + datetime.timedelta(days=_loaded_days(os.path.join(data_dir, 'corona')) - 1)
+    youtube_first = datetime.date.fromisoformat(YOUTUBE_START_DATE)
+    trending_days = _line_count(os.path.join(data_dir, 'youtube', f'{YOUTUBE_COUNTRIES[0]}videos.csv'))
+    trending_days //= BASE_VIDEOS * scale
+    return {
+        **{table: (first, last) for table in ('day_wise', 'full_grouped', 'covid_19_clean_complete', 'usa_county_wise')},
+        'youtube_videos': (youtube_first, youtube_first + datetime.timedelta(days=trending_days - 1)),
+    }
+
+
+def count_rows(data_dir):
+    """Data rows per CSV file under `data_dir`."""
+    counts = {}
+    for root, _, files in os.walk(data_dir):
+        for fname in sorted(files):
+            if fname.endswith('.csv'):
+                counts[os.path.relpath(os.path.join(root, fname), data_dir)] = _line_count(os.path.join(root, fname))
+    return counts
+
+
+def write_videos_csv(path, rows, seed=SEED):
+    """Write a single YouTube trending-like CSV with exactly `rows` rows."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['video_id', 'trending_date', 'title', 'channel_title', 'category_id',
+                         'publish_time', 'tags', 'views', 'likes', 'dislikes', 'comment_count',
+                         'thumbnail_link', 'comments_disabled', 'ratings_disabled',
+                         'video_error_or_removed', 'description'])
+        for i in range(rows):
+            video_id = f"v{i:010d}"
+            writer.writerow([
+                video_id,
+                f"17.{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}",
+                f"Video title {i} " + 'x' * rng.randint(5, 60),
+                f"Channel {rng.randint(1, 5000)}",
+                rng.choice(list(CATEGORIES)),
+                f"2017-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00.000Z",
+                '"tag1"|"tag2"|"tag3"',
+                rng.randint(100, 10_000_000),
+                rng.randint(0, 100_000),
+                rng.randint(0, 10_000),
+                rng.randint(0, 50_000),
+                f"https://i.ytimg.com/vi/{video_id}/default.jpg",
+                False,
+                False,
+                False,
+                'Description line one\\nline two ' + 'y' * rng.randint(0, 200),
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data_dir', help='directory receiving corona/ and youtube/')
+    parser.add_argument('--scale', type=int, default=1, help='multiplier of the base row counts')
+    args = parser.parse_args()
+    counts = write_dataset(args.data_dir, args.scale)
+    for path, rows in counts.items():
+        print(f"{path:<40} {rows:>12,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import os
+import time
+import logging
+from datetime import datetime
+
+from src.ingestion.lake import LAKE_DIR, lake_layout
+from src.ingestion.merge import table_exists, table_types
+
+logger = logging.getLogger(__name__)
+
+# Table statistics computed once per load, so readers never scan the tables
+STATS_TABLE = 'table_statistics'
+COLUMN_STATS_TABLE = 'column_statistics'
+CATALOG_TABLES = (STATS_TABLE, COLUMN_STATS_TABLE)
+
+# min/max are not meaningful for nested types
+NESTED_TYPE_MARKERS = ('[]', 'STRUCT', 'MAP', 'UNION')
+
+
+def ensure_catalog(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            row_count BIGINT,
+            row_estimate BIGINT,
+            column_count INTEGER,
+            lake_bytes BIGINT,
+            exact BOOLEAN,
+            computed_at TIMESTAMP,
+            compute_seconds DOUBLE,
+            storage_bytes BIGINT
+        )
+    """)
+    # Catalogs created before the table sizes were measured
+    con.execute(f"ALTER TABLE {STATS_TABLE} ADD COLUMN IF NOT EXISTS storage_bytes BIGINT")
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {COLUMN_STATS_TABLE} (
+            table_name VARCHAR,
+            column_name VARCHAR,
+            ordinal INTEGER,
+            column_type VARCHAR,
+            null_count BIGINT,
+            distinct_count BIGINT,
+            min_value VARCHAR,
+            max_value VARCHAR,
+            PRIMARY KEY (table_name, column_name)
+        )
+    """)
+
+
+def catalog_tables(con):
+    """Base tables described by the catalog (views and the catalog itself excluded)."""
+    rows = con.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """).fetchall()
+    return [row[0] for row in rows if row[0] not in CATALOG_TABLES]
+
+
+def storage_bytes(con, table_name):
+    """Size of `table_name` in the database file: its blocks times the block size.
+
+    Blocks the table shares with others count in full, and rows not
+    checkpointed yet are left out (`refresh_statistics` checkpoints first).
+    """
+    block_size = con.execute(
+        "SELECT block_size FROM pragma_database_size() WHERE database_name = current_database()"
+    ).fetchone()[0]
+    blocks = con.execute(
+        f"SELECT COUNT(DISTINCT block_id) FROM pragma_storage_info('{table_name}') WHERE persistent"
+    ).fetchone()[0]
+    return blocks * block_size
+
+
+def lake_bytes(table_name):
+    """Size on disk of the Parquet copy of `table_name`, None if it has none."""
+    dataset_dir = os.path.join(LAKE_DIR, lake_layout(table_name)['dataset'])
+    if not os.path.isdir(dataset_dir):
+        return None
+    return sum(
+        os.path.getsize(os.path.join(root, fname))
+        for root, _, files in os.walk(dataset_dir) for fname in files
+    )
+
+
+def _column_aggregates(column, column_type, exact):
+    quoted = f'"{column}"'
+    distinct = f'COUNT(DISTINCT {quoted})' if exact else f'approx_count_distinct({quoted})'
+    if any(marker in column_type for marker in NESTED_TYPE_MARKERS):
+        bounds = 'NULL, NULL'
+    else:
+        bounds = f'CAST(MIN({quoted}) AS VARCHAR), CAST(MAX({quoted}) AS VARCHAR)'
+    return f'COUNT(*) - COUNT({quoted}), {distinct}, {bounds}'
+
+
+def _row_estimates(con):
+    # DuckDB's estimated_size grows with every insert (deleted rows are only
+    # subtracted on vacuum), so a change means the table was written to
+    return dict(con.execute(
+        "SELECT table_name, estimated_size FROM duckdb_tables() WHERE schema_name = 'main'"
+    ).fetchall())
+
+
+def refresh_table_statistics(con, table_name, exact=False):
+    """Compute the statistics of `table_name` in a single scan and store them.
+
+    Distinct counts are HyperLogLog estimates (`approx_count_distinct`) unless
+    `exact` is set; row counts, null counts and min/max are always exact.
+    """
+    ensure_catalog(con)
+    start = time.perf_counter()
+    types = table_types(con, table_name)
+    aggregates = ', '.join(_column_aggregates(column, column_type, exact) for column, column_type in types.items())
+    row = con.execute(f'SELECT COUNT(*), {aggregates} FROM "{table_name}"').fetchone()
+    row_count, values = row[0], row[1:]
+
+    columns = [
+        (table_name, column, ordinal, column_type, *values[4 * ordinal:4 * ordinal + 4])
+        for ordinal, (column, column_type) in enumerate(types.items())
+    ]
+    seconds = time.perf_counter() - start
+    # Rows are upserted rather than deleted and inserted again: before 0.10,
+    # DuckDB rejects re-inserting a deleted primary key in the same transaction
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(
+            f"DELETE FROM {COLUMN_STATS_TABLE} WHERE table_name = ? AND NOT list_contains(?, column_name)",
+            [table_name, list(types)],
+        )
+        if columns:
+            con.executemany(
+                f"""
+                INSERT INTO {COLUMN_STATS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (table_name, column_name) DO UPDATE SET
+                    ordinal = EXCLUDED.ordinal, column_type = EXCLUDED.column_type,
+                    null_count = EXCLUDED.null_count, distinct_count = EXCLUDED.distinct_count,
+                    min_value = EXCLUDED.min_value, max_value = EXCLUDED.max_value
+                """,
+                columns,
+            )
+        con.execute(
+            f"""
+            INSERT INTO {STATS_TABLE} (
+                table_name, row_count, row_estimate, column_count, lake_bytes, exact, computed_at,
+                compute_seconds, storage_bytes
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (table_name) DO UPDATE SET
+                row_count = EXCLUDED.row_count, row_estimate = EXCLUDED.row_estimate,
+                column_count = EXCLUDED.column_count, lake_bytes = EXCLUDED.lake_bytes,
+                exact = EXCLUDED.exact, computed_at = EXCLUDED.computed_at,
+                compute_seconds = EXCLUDED.compute_seconds, storage_bytes = EXCLUDED.storage_bytes
+            """,
+            [
+                table_name, row_count, _row_estimates(con).get(table_name), len(types),
+                lake_bytes(table_name), exact, datetime.now(), seconds, storage_bytes(con, table_name),
+            ],
+        )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return row_count
+
+
+def refresh_statistics(con, changes=None, exact=False):
+    """Update the catalog after a load.
+
+    Recomputes the tables with changed partitions in `changes` (see
+    `summaries.merge_changes`), tables written to since their statistics were
+    taken and tables not in the catalog yet, and drops the entries of tables
+    that no longer exist. With `changes=None` every table is recomputed.
+    """
+    ensure_catalog(con)
+    # Writes still in the WAL have no blocks for `storage_bytes` to count
+    con.execute("CHECKPOINT")
+    tables = catalog_tables(con)
+    known = dict(con.execute(f"SELECT table_name, row_estimate FROM {STATS_TABLE}").fetchall())
+    for table_name in set(known) - set(tables):
+        drop_table_statistics(con, table_name)
+    estimated = _row_estimates(con)
+
+    for table_name in tables:
+        stale = table_name not in known or estimated.get(table_name) != known[table_name]
+        if changes is not None and not stale and changes.get(table_name, []) == []:
+            continue
+        start = time.perf_counter()
+        rows = refresh_table_statistics(con, table_name, exact)
+        logger.info(f'Statistics of {table_name} ({rows:,} rows) computed in {time.perf_counter() - start:.2f}s.')
+
+
+def drop_table_statistics(con, table_name):
+    """Forget the statistics of a dropped table."""
+    if table_exists(con, STATS_TABLE):
+        con.execute(f"DELETE FROM {STATS_TABLE} WHERE table_name = ?", [table_name])
+        con.execute(f"DELETE FROM {COLUMN_STATS_TABLE} WHERE table_name = ?", [table_name])
@@ -0,0 +1,166 @@
+import csv
+import duckdb
+import pandas as pd
+import os
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How CSV files are loaded into DuckDB:
+#   "native" - DuckDB's parallel read_csv streams the file straight into the table
+#   "pandas" - the file is read into a DataFrame first, then copied into DuckDB
+INGEST_MODE = os.environ.get('MINILAKE_INGEST_MODE', 'native')
+INGEST_MODES = ('native', 'pandas')
+
+# Chunk size used when re-encoding non UTF-8 files for the native reader
+TRANSCODE_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def sql_literal(value):
+    """Quote a Python value as a SQL string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def read_csv_expression(fpath, types=None, dialect=None):
+    """Build the read_csv(...) table function call for a CSV file.
+
+    `types` optionally maps column names to DuckDB types; all other columns
+    are sniffed by DuckDB. `dialect` optionally fixes the `delim`, `quote` and
+    `escape` options instead of letting DuckDB sniff them.
+    """
+    options = ["header = true", "auto_detect = true"]
+    options += [f"{option} = {sql_literal(value)}" for option, value in (dialect or {}).items()]
+    if types:
+        type_list = ', '.join(f"{sql_literal(col)}: {sql_literal(dtype)}" for col, dtype in types.items())
+        options.append(f"types = {{{type_list}}}")
+    return f"read_csv({sql_literal(fpath)}, {', '.join(options)})"
+
+
+def transcode_to_utf8(fpath, encoding):
+    """Stream `fpath` from `encoding` into a temporary UTF-8 file and return its path.
+
+    DuckDB's CSV reader only understands UTF-8, so files in other encodings are
+    re-encoded chunk by chunk instead of being loaded into memory.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix='.csv', prefix='minilake_')
+    try:
+        with open(fpath, 'r', encoding=encoding, newline='') as src, \
+                os.fdopen(fd, 'w', encoding='utf-8', newline='') as dst:
+            while True:
+                chunk = src.read(TRANSCODE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def _is_encoding_error(error):
+    return isinstance(error, UnicodeDecodeError) or 'unicode' in str(error).lower()
+
+
+def _load_native(con, fpath, sink, encoding, types, dialect):
+    if encoding.lower().replace('-', '') in ('utf8', 'utf8sig'):
+        con.execute(sink.replace('{source}', f"SELECT * FROM {read_csv_expression(fpath, types, dialect)}"))
+        return
+    tmp_path = transcode_to_utf8(fpath, encoding)
+    try:
+        con.execute(sink.replace('{source}', f"SELECT * FROM {read_csv_expression(tmp_path, types, dialect)}"))
+    finally:
+        os.remove(tmp_path)
+
+
+def _load_pandas(con, fpath, sink, encoding, types, dialect):
+    dialect = dialect or {}
+    df = pd.read_csv(fpath, encoding=encoding, sep=dialect.get('delim', ','), quotechar=dialect.get('quote', '"'))
+    if types:
+        casts = ', '.join(
+            f'CAST("{col}" AS {types[col]}) AS "{col}"' if col in types else f'"{col}"'
+            for col in df.columns
+        )
+        con.execute(sink.replace('{source}', f"SELECT {casts} FROM df"))
+    else:
+        con.execute(sink.replace('{source}', "SELECT * FROM df"))
+
+
+def csv_header(fpath, encoding='utf-8'):
+    """Column names of a CSV file."""
+    with open(fpath, 'r', encoding=encoding, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def _converted(fpath, sink, encoding, types, conversions):
+    """Sink and read types applying `conversions` to the columns of the file that have one.
+
+    Those columns are read as text and converted in the same statement.
+    """
+    columns = [column for column in csv_header(fpath, encoding) if column in (conversions or {})]
+    if not columns:
+        return sink, types
+    types = dict(types or {}, **{column: 'VARCHAR' for column in columns})
+    replace = ', '.join(conversions[column].format(column=f'"{column}"') + f' AS "{column}"' for column in columns)
+    return sink.replace('{source}', f'SELECT * REPLACE ({replace}) FROM ({{source}})'), types
+
+
+def _read_csv_into(con, fpath, sink, encodings, mode, types, conversions=None, dialect=None):
+    """Run `sink`, a statement with a `{source}` placeholder, over the rows of a CSV file.
+
+    Encodings are tried in order; a warning is logged when a fallback encoding
+    had to be used. The last error is re-raised when none of them works.
+    `conversions` maps column names to SQL templates (see
+    `schema.conversion_template`) applied to the text of those columns.
+    `dialect` is passed on to `read_csv_expression`.
+    """
+    mode = mode or INGEST_MODE
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingestion mode '{mode}', expected one of {INGEST_MODES}")
+    loader = _load_native if mode == 'native' else _load_pandas
+
+    last_error = None
+    for i, encoding in enumerate(encodings):
+        try:
+            converted_sink, read_types = _converted(fpath, sink, encoding, types, conversions)
+            loader(con, fpath, converted_sink, encoding, read_types, dialect)
+        except (UnicodeDecodeError, duckdb.Error) as e:
+            if not _is_encoding_error(e):
+                raise
+            last_error = e
+            continue
+        if i > 0:
+            logger.warning(f"Warning: {os.path.basename(fpath)} was read with '{encoding}' encoding.")
+        return
+    raise last_error
+
+
+def load_csv(con, fpath, table_name, encodings=('utf-8',), mode=None, types=None, temporary=False,
+             conversions=None, dialect=None):
+    """Load a CSV file into `table_name`, replacing it, and return the row count.
+
+    With `temporary` the table is a connection-local TEMP table, which leaves
+    nothing behind in the database if the process dies.
+    """
+    kind = 'TEMP TABLE' if temporary else 'TABLE'
+    _read_csv_into(con, fpath, f"CREATE OR REPLACE {kind} {table_name} AS {{source}}", encodings, mode, types,
+                   conversions, dialect)
+    return con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+
+def stage_csv(fpath, parquet_path, encodings=('utf-8',), mode=None, types=None, threads=None, conversions=None,
+              dialect=None):
+    """Parse a CSV file into a Parquet file and return the row count.
+
+    Runs on its own in-memory DuckDB connection, so it can be called from
+    worker threads without touching the lake database.
+    """
+    con = duckdb.connect()
+    try:
+        if threads:
+            con.execute(f"SET threads = {int(threads)}")
+        _read_csv_into(con, fpath, f"COPY ({{source}}) TO {sql_literal(parquet_path)} (FORMAT PARQUET)",
+                       encodings, mode, types, conversions, dialect)
+        return con.execute(f"SELECT COUNT(*) FROM read_parquet({sql_literal(parquet_path)})").fetchone()[0]
+    finally:
+        con.close()
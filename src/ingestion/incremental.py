@@ -0,0 +1,184 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import logging
+from datetime import datetime
+
+from src.ingestion.merge import table_exists
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_TABLE = 'ingestion_watermarks'
+
+# Date-keyed tables whose source files only ever grow by appending new dates
+WATERMARK_COLUMNS = {
+    'day_wise': 'Date',
+    'full_grouped': 'Date',
+    'covid_19_clean_complete': 'Date',
+    'usa_county_wise': 'Date',
+}
+
+# Text format of the dates not written in ISO 8601. The format is tried before
+# ISO, because DuckDB's DATE cast also accepts '2/5/20', as the year 2.
+DATE_FORMATS = {
+    ('youtube_videos', 'trending_date'): '%y.%d.%m',
+    ('usa_county_wise', 'Date'): '%m/%d/%y',
+}
+
+# Bytes before the stored offset that must be unchanged for the file to count as appended to
+TAIL_CHECK_SIZE = 64 * 1024
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+# CSV dialect of the source files, used to read a tail instead of sniffing a
+# handful of appended rows, which may not be enough to tell the quoting apart
+TAIL_DIALECT = {'delim': ',', 'quote': '"', 'escape': '"'}
+
+
+def ensure_watermarks(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            watermark DATE,
+            path VARCHAR,
+            byte_offset BIGINT,
+            header_hash VARCHAR,
+            tail_hash VARCHAR,
+            updated_at TIMESTAMP
+        )
+    """)
+
+
+def parse_date(text, date_format):
+    """SQL expression turning the text `text` into a DATE, read in `date_format`, else as ISO 8601."""
+    return f"COALESCE(CAST(TRY_STRPTIME({text}, '{date_format}') AS DATE), TRY_CAST({text} AS DATE))"
+
+
+def date_expression(table_name, column):
+    """SQL expression turning `column` of `table_name` into a DATE, whether it
+    holds a DATE, text in the table's DATE_FORMATS format or an ISO string.
+
+    DuckDB folds the type test, so a DATE column is read as is.
+    """
+    date_format = DATE_FORMATS.get((table_name, column))
+    if date_format is None:
+        return f'TRY_CAST("{column}" AS DATE)'
+    text = parse_date(f'CAST("{column}" AS VARCHAR)', date_format)
+    return f'CASE WHEN typeof("{column}") = \'DATE\' THEN TRY_CAST("{column}" AS DATE) ELSE {text} END'
+
+
+def _read_header(fpath):
+    with open(fpath, 'rb') as f:
+        return f.readline()
+
+
+def _hash_range(fpath, start, end):
+    digest = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        f.seek(start)
+        digest.update(f.read(end - start))
+    return digest.hexdigest()
+
+
+def line_boundary(fpath):
+    """Offset just past the last complete line of the file."""
+    size = os.path.getsize(fpath)
+    with open(fpath, 'rb') as f:
+        pos = size
+        while pos > 0:
+            start = max(0, pos - COPY_CHUNK_SIZE)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                return start + newline + 1
+            pos = start
+    return 0
+
+
+def plan_incremental(con, fpath, table_name):
+    """Decide whether `fpath` can be loaded incrementally into `table_name`.
+
+    Returns the stored watermark state when the file has only been appended to
+    since the last load, and None when a full refresh is needed: no watermark
+    yet, a missing table, a changed header, a rewritten or truncated prefix, or
+    a table whose latest date no longer matches the watermark.
+    """
+    if table_name not in WATERMARK_COLUMNS or not table_exists(con, WATERMARK_TABLE):
+        return None
+    row = con.execute(
+        f"SELECT watermark, byte_offset, header_hash, tail_hash FROM {WATERMARK_TABLE} WHERE table_name = ?",
+        [table_name],
+    ).fetchone()
+    if row is None or not table_exists(con, table_name):
+        return None
+
+    watermark, byte_offset, header_hash, tail_hash = row
+    reason = None
+    if os.path.getsize(fpath) < byte_offset:
+        reason = 'file is smaller than the last ingested offset'
+    elif hashlib.sha256(_read_header(fpath)).hexdigest() != header_hash:
+        reason = 'header changed'
+    elif _hash_range(fpath, max(0, byte_offset - TAIL_CHECK_SIZE), byte_offset) != tail_hash:
+        reason = 'already ingested rows were rewritten'
+    else:
+        column = WATERMARK_COLUMNS[table_name]
+        current = con.execute(f"SELECT MAX({date_expression(table_name, column)}) FROM {table_name}").fetchone()[0]
+        if current != watermark:
+            reason = f'table max {column} {current} does not match watermark {watermark}'
+    if reason:
+        logger.warning(f'Full refresh of {table_name}: {reason}.')
+        return None
+    return {'watermark': watermark.isoformat(), 'byte_offset': byte_offset}
+
+
+def write_tail(fpath, byte_offset):
+    """Copy the header and everything after `byte_offset` into a temporary CSV file.
+
+    The already ingested prefix is skipped with a seek, so it is never parsed.
+    The header is ended like the first appended row: rows appended with other
+    line endings than the rest of the file would otherwise fail to parse.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix='.csv', prefix='minilake_tail_')
+    with os.fdopen(fd, 'wb') as dst, open(fpath, 'rb') as src:
+        header = src.readline()
+        src.seek(max(byte_offset, len(header)))
+        first = src.readline()
+        dst.write(header.rstrip(b'\r\n') + (b'\r\n' if first.endswith(b'\r\n') else b'\n') + first)
+        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+    return tmp_path
+
+
+def tail_is_consistent(con, staging_table, table_name, watermark):
+    """True when no appended row is dated before the watermark (a DATE or ISO date string)."""
+    column = WATERMARK_COLUMNS[table_name]
+    oldest, stale = con.execute(
+        f"SELECT MIN(d), BOOL_OR(d < CAST(? AS DATE)) FROM (SELECT {date_expression(table_name, column)} AS d FROM {staging_table})",
+        [str(watermark)],
+    ).fetchone()
+    if stale:
+        logger.warning(f'Full refresh of {table_name}: appended rows start at {oldest}, before watermark {watermark}.')
+        return False
+    return True
+
+
+def record_watermark(con, fpath, table_name, byte_offset):
+    """Store the latest date of `table_name` and how far `fpath` has been read."""
+    ensure_watermarks(con)
+    column = WATERMARK_COLUMNS[table_name]
+    watermark = con.execute(f"SELECT MAX({date_expression(table_name, column)}) FROM {table_name}").fetchone()[0]
+    con.execute(
+        f"""
+        INSERT INTO {WATERMARK_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (table_name) DO UPDATE SET
+            watermark = EXCLUDED.watermark, path = EXCLUDED.path, byte_offset = EXCLUDED.byte_offset,
+            header_hash = EXCLUDED.header_hash, tail_hash = EXCLUDED.tail_hash, updated_at = EXCLUDED.updated_at
+        """,
+        [
+            table_name, watermark, os.path.abspath(fpath), byte_offset,
+            hashlib.sha256(_read_header(fpath)).hexdigest(),
+            _hash_range(fpath, max(0, byte_offset - TAIL_CHECK_SIZE), byte_offset),
+            datetime.now(),
+        ],
+    )
+    logger.info(f'Watermark of {table_name} is now {watermark} (offset {byte_offset}).')
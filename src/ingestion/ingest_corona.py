@@ -1,102 +1,110 @@
-import duckdb
-import pandas as pd
 import os
+import sys
 import logging
 
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.ingestion.csv_loader import load_csv
+from src.ingestion.merge import merge_table, table_types
+from src.ingestion.manifest import check_file, record_file
+from src.ingestion.incremental import (
+    TAIL_DIALECT, WATERMARK_COLUMNS, line_boundary, plan_incremental, record_watermark, tail_is_consistent, write_tail,
+)
+from src.ingestion.paths import DATA_DIR, DB_PATH
+from src.ingestion.pipeline import ingest_source, stage_source
+from src.ingestion.schema import order_by, table_conversions
+from src.ingestion.lake import create_lake_view, export_table, partition_expression
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def ingest_corona_data():
-    # Paths
-    corona_dir = os.path.join(os.path.dirname(__file__), '../../data/corona')
-    db_path = os.path.join(os.path.dirname(__file__), '../../minilake.duckdb')
-
-    # Connect to DuckDB
-    db_path = os.path.abspath(db_path)
-    logger.info(f"DuckDB file (db_path) is: {db_path}")
-    con = duckdb.connect(db_path)
-
-    try:
-        # Ingest all corona CSVs
-        logger.info("Corona data directory contents:")
-        for f in os.listdir(corona_dir):
-            logger.info(f"  {f}")
-
-        for fname in os.listdir(corona_dir):
-            if fname.endswith('.csv'):
-                fpath = os.path.join(corona_dir, fname)
-                logger.info(f'Ingesting {fpath}...')
-                df = pd.read_csv(fpath)
-                table_name = fname.replace('.csv', '').lower()
-                temp_table = f"{table_name}_temp"
-                
-                # Create a temporary table with the new data
-                con.execute(f"CREATE OR REPLACE TABLE {temp_table} AS SELECT * FROM df")
-                
-                # Check if the main table exists
-                table_exists = con.execute(f"""
-                    SELECT COUNT(*) 
-                    FROM information_schema.tables 
-                    WHERE table_name = '{table_name}'
-                """).fetchone()[0] > 0
-                
-                if table_exists:
-                    # Get the primary key columns based on the table
-                    if table_name == 'day_wise':
-                        pk_columns = ['Date']
-                    elif table_name == 'country_wise_latest':
-                        pk_columns = ['Country/Region']
-                    elif table_name == 'worldometer_data':
-                        pk_columns = ['Country/Region']
-                    elif table_name == 'usa_county_wise':
-                        pk_columns = ['County', 'State', 'Date']
-                    elif table_name == 'full_grouped':
-                        pk_columns = ['Date', 'Country/Region']
-                    elif table_name == 'covid_19_clean_complete':
-                        pk_columns = ['Date', 'Country/Region', 'Province/State']
-                    else:
-                        pk_columns = ['Date', 'Country/Region']  # default fallback
-                    
-                    # Create a new table that combines existing and new data, removing duplicates
-                    pk_conditions = ' AND '.join([f"t1.{col} = t2.{col}" for col in pk_columns])
-                    con.execute(f"""
-                        CREATE OR REPLACE TABLE {table_name}_new AS
-                        SELECT DISTINCT *
-                        FROM (
-                            SELECT * FROM {table_name}
-                            UNION ALL
-                            SELECT * FROM {temp_table}
-                        ) t1
-                        WHERE NOT EXISTS (
-                            SELECT 1 FROM {temp_table} t2
-                            WHERE {pk_conditions}
-                            AND t1.rowid > t2.rowid
-                        )
-                    """)
-                    
-                    # Replace the old table with the new one
-                    con.execute(f"DROP TABLE {table_name}")
-                    con.execute(f"ALTER TABLE {table_name}_new RENAME TO {table_name}")
-                    logger.info(f'Table {table_name} updated with new data in DuckDB.')
-                else:
-                    # If table doesn't exist, just rename the temp table
-                    con.execute(f"ALTER TABLE {temp_table} RENAME TO {table_name}")
-                    logger.info(f'Table {table_name} created in DuckDB.')
-                
-                # Clean up temporary table
-                con.execute(f"DROP TABLE IF EXISTS {temp_table}")
-
-    except Exception as e:
-        logger.error(f"Error during ingestion: {str(e)}")
-        raise
-    finally:
-        con.close()
-        logger.info('Ingestion complete.')
-
-def main():
+CORONA_DIR = os.path.join(DATA_DIR, 'corona')
+
+def plan_files(con, force=False):
+    """Decide which corona CSVs need ingesting and which part of each to parse.
+
+    Files whose fingerprint matches the ingestion manifest are skipped unless
+    `force` is set. Append-only, date-keyed files are read from the offset
+    reached by the last run.
+    """
+    logger.info("Corona data directory contents:")
+    for f in os.listdir(CORONA_DIR):
+        logger.info(f"  {f}")
+
+    tasks, touched, skipped = [], [], 0
+    for fname in sorted(os.listdir(CORONA_DIR)):
+        if fname.endswith('.csv'):
+            fpath = os.path.join(CORONA_DIR, fname)
+            table_name = fname.replace('.csv', '').lower()
+
+            # Skip files that have not changed since the last run
+            unchanged, fingerprint = check_file(con, fpath, table_name)
+            if unchanged and not force:
+                logger.info(f'Skipping {fpath}: unchanged since last ingestion.')
+                skipped += 1
+                if fingerprint['touched']:
+                    touched.append(fingerprint)
+                continue
+
+            logger.info(f'Ingesting {fpath}...')
+            task = {
+                'path': fpath, 'source': fpath, 'table_name': table_name, 'fingerprint': fingerprint,
+                'end_offset': line_boundary(fpath), 'incremental': None, 'types': None,
+            }
+            incremental = None if force else plan_incremental(con, fpath, table_name)
+            if incremental:
+                # Only parse the rows appended since the last run
+                task.update(
+                    source=write_tail(fpath, incremental['byte_offset']),
+                    types=table_types(con, table_name),
+                    dialect=TAIL_DIALECT,
+                    incremental=incremental,
+                )
+            tasks.append(task)
+    return tasks, touched, skipped
+
+def apply_file(con, task, temp_table):
+    """Merge one parsed corona file into its table and its lake partitions."""
+    table_name = task['table_name']
+    incremental = task['incremental']
+    if incremental:
+        if tail_is_consistent(con, temp_table, table_name, incremental['watermark']):
+            logger.info(f"Loaded rows appended to {task['path']} after {incremental['watermark']}.")
+        else:
+            load_csv(con, task['path'], temp_table, temporary=True, conversions=table_conversions(table_name))
+
+    # Merge the new and changed rows into the main table, kept in its declared order
+    stats = merge_table(
+        con, table_name, temp_table,
+        partition_expression=partition_expression(table_name), order_by=order_by(table_name),
+    )
+    record_file(con, task['fingerprint'], table_name, stats)
+    if table_name in WATERMARK_COLUMNS:
+        record_watermark(con, task['path'], table_name, task['end_offset'])
+
+    # Refresh the Parquet copy of the partitions that changed
+    export_table(con, table_name, stats['changed_partitions'])
+    create_lake_view(con, table_name)
+    return stats
+
+def ingest_corona_data(force=False):
+    """Ingest changed CSV files and return how many were processed and skipped."""
+    logger.info(f"DuckDB file (db_path) is: {DB_PATH}")
+    summary = ingest_source(plan_files, apply_file, force=force)
+    logger.info('Ingestion complete.')
+    return summary
+
+def stage_corona_data(force=False):
+    """Parse changed CSV files without writing to DuckDB (see `pipeline.stage_source`)."""
+    return stage_source(plan_files, force=force)
+
+def main(force=False):
     """Main function to be called by Airflow"""
-    ingest_corona_data()
+    return ingest_corona_data(force=force)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
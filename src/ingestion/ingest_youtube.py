@@ -1,89 +1,157 @@
-import duckdb
-import pandas as pd
+import json
 import os
+import sys
 import logging
 
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.ingestion.csv_loader import sql_literal
+from src.ingestion.merge import merge_table, table_exists
+from src.ingestion.manifest import check_file, record_file
+from src.ingestion.paths import DATA_DIR
+from src.ingestion.pipeline import ingest_source, stage_source
+from src.ingestion.schema import order_by
+from src.ingestion.lake import create_lake_view, export_table, partition_expression
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def ingest_youtube_data():
-    # Paths
-    youtube_dir = os.path.join(os.path.dirname(__file__), '../../data/youtube')
-    db_path = os.path.join(os.path.dirname(__file__), '../../minilake.duckdb')
-
-    # Connect to DuckDB
-    db_path = os.path.abspath(db_path)
-    con = duckdb.connect(db_path)
-
-    try:
-        # Ingest all YouTube CSVs
-        for fname in os.listdir(youtube_dir):
-            if fname.endswith('.csv'):
-                fpath = os.path.join(youtube_dir, fname)
-                logger.info(f'Ingesting {fpath}...')
-                try:
-                    df = pd.read_csv(fpath, encoding='utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        df = pd.read_csv(fpath, encoding='latin1')
-                        logger.warning(f"Warning: {fname} was read with 'latin1' encoding.")
-                    except Exception as e:
-                        logger.error(f'Failed to ingest {fname}: {e}')
-                        continue
-                
-                table_name = f"youtube_{fname.replace('.csv', '').lower()}"
-                temp_table = f"{table_name}_temp"
-                
-                # Create a temporary table with the new data
-                con.execute(f"CREATE OR REPLACE TABLE {temp_table} AS SELECT * FROM df")
-                
-                # Check if the main table exists
-                table_exists = con.execute(f"""
-                    SELECT COUNT(*) 
-                    FROM information_schema.tables 
-                    WHERE table_name = '{table_name}'
-                """).fetchone()[0] > 0
-                
-                if table_exists:
-                    # For YouTube data, video_id is the primary key
-                    con.execute(f"""
-                        CREATE OR REPLACE TABLE {table_name}_new AS
-                        SELECT DISTINCT *
-                        FROM (
-                            SELECT * FROM {table_name}
-                            UNION ALL
-                            SELECT * FROM {temp_table}
-                        ) t1
-                        WHERE NOT EXISTS (
-                            SELECT 1 FROM {temp_table} t2
-                            WHERE t1.video_id = t2.video_id
-                            AND t1.rowid > t2.rowid
-                        )
-                    """)
-                    
-                    # Replace the old table with the new one
-                    con.execute(f"DROP TABLE {table_name}")
-                    con.execute(f"ALTER TABLE {table_name}_new RENAME TO {table_name}")
-                    logger.info(f'Table {table_name} updated with new data in DuckDB.')
-                else:
-                    # If table doesn't exist, just rename the temp table
-                    con.execute(f"ALTER TABLE {temp_table} RENAME TO {table_name}")
-                    logger.info(f'Table {table_name} created in DuckDB.')
-                
-                # Clean up temporary table
-                con.execute(f"DROP TABLE IF EXISTS {temp_table}")
-
-    except Exception as e:
-        logger.error(f"Error during ingestion: {str(e)}")
-        raise
-    finally:
-        con.close()
-        logger.info('YouTube ingestion complete.')
-
-def main():
+YOUTUBE_DIR = os.path.join(DATA_DIR, 'youtube')
+
+# All countries are stored in one fact table, clustered by country then trending day
+VIDEOS_TABLE = 'youtube_videos'
+CATEGORIES_TABLE = 'youtube_categories'
+COUNTRY_TYPE = 'youtube_country'
+COUNTRIES = ['CA', 'DE', 'FR', 'GB', 'IN', 'JP', 'KR', 'MX', 'RU', 'US']
+VIDEOS_ORDER = order_by(VIDEOS_TABLE)
+
+def ensure_country_type(con):
+    exists = con.execute(
+        f"SELECT COUNT(*) FROM duckdb_types() WHERE type_name = '{COUNTRY_TYPE}'"
+    ).fetchone()[0] > 0
+    if not exists:
+        values = ', '.join(sql_literal(country) for country in COUNTRIES)
+        con.execute(f"CREATE TYPE {COUNTRY_TYPE} AS ENUM ({values})")
+
+def plan_files(con, force=False):
+    """Decide which YouTube CSVs need ingesting.
+
+    Files whose fingerprint matches the ingestion manifest are skipped unless
+    `force` is set.
+    """
+    tasks, touched, skipped = [], [], 0
+    for fname in sorted(os.listdir(YOUTUBE_DIR)):
+        if fname.endswith('videos.csv'):
+            fpath = os.path.join(YOUTUBE_DIR, fname)
+            country = fname[:-len('videos.csv')].upper()
+            if country not in COUNTRIES:
+                logger.error(f'Failed to ingest {fname}: unknown country {country}')
+                continue
+
+            # Skip files that have not changed since the last run
+            unchanged, fingerprint = check_file(con, fpath, VIDEOS_TABLE)
+            if unchanged and not force:
+                logger.info(f'Skipping {fpath}: unchanged since last ingestion.')
+                skipped += 1
+                if fingerprint['touched']:
+                    touched.append(fingerprint)
+                continue
+
+            logger.info(f'Ingesting {fpath}...')
+            tasks.append({
+                'path': fpath, 'source': fpath, 'table_name': VIDEOS_TABLE, 'fingerprint': fingerprint,
+                'encodings': ('utf-8', 'latin1'), 'extra_columns': {'country': sql_literal(country)},
+            })
+    return tasks, touched, skipped
+
+def apply_file(con, task, temp_table):
+    """Merge one parsed country file into the videos table and its lake partition."""
+    ensure_country_type(con)
+    con.execute(f"ALTER TABLE {temp_table} ALTER country TYPE {COUNTRY_TYPE}")
+
+    # Merge the new and changed rows into the main table
+    stats = merge_table(
+        con, VIDEOS_TABLE, temp_table,
+        partition_expression=partition_expression(VIDEOS_TABLE), order_by=VIDEOS_ORDER,
+    )
+    record_file(con, task['fingerprint'], VIDEOS_TABLE, stats)
+
+    # Refresh the Parquet copy of this country
+    export_table(con, VIDEOS_TABLE, stats['changed_partitions'])
+    create_lake_view(con, VIDEOS_TABLE)
+    return stats
+
+def load_categories(con):
+    """Load the `<country>_category_id.json` files into the categories lookup table.
+
+    Returns the countries whose categories were reloaded.
+    """
+    ensure_country_type(con)
+    reloaded = []
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CATEGORIES_TABLE} (
+            country {COUNTRY_TYPE},
+            category_id INTEGER,
+            category_name VARCHAR,
+            assignable BOOLEAN,
+            PRIMARY KEY (country, category_id)
+        )
+    """)
+    for fname in sorted(os.listdir(YOUTUBE_DIR)):
+        if fname.endswith('_category_id.json'):
+            fpath = os.path.join(YOUTUBE_DIR, fname)
+            country = fname[:-len('_category_id.json')].upper()
+            if country not in COUNTRIES:
+                continue
+            unchanged, fingerprint = check_file(con, fpath, CATEGORIES_TABLE)
+            if unchanged:
+                continue
+            with open(fpath, encoding='utf-8') as f:
+                items = json.load(f).get('items', [])
+            rows = [
+                (country, int(item['id']), item['snippet']['title'], item['snippet'].get('assignable'))
+                for item in items
+            ]
+            con.execute(f"DELETE FROM {CATEGORIES_TABLE} WHERE country = ?", [country])
+            if rows:
+                con.executemany(f"INSERT INTO {CATEGORIES_TABLE} VALUES (?, ?, ?, ?)", rows)
+            record_file(con, fingerprint, CATEGORIES_TABLE, {'rows_in': len(rows), 'inserted': len(rows), 'updated': 0})
+            logger.info(f'Loaded {len(rows)} categories for {country}.')
+            reloaded.append(country)
+    return reloaded
+
+def finalize(con):
+    """Load the category lookup and drop the old per-country tables once superseded.
+
+    Returns the countries whose categories changed, for the summary refresh
+    (nothing when none did).
+    """
+    reloaded = load_categories(con)
+    if table_exists(con, VIDEOS_TABLE):
+        for country in COUNTRIES:
+            legacy_table = f"youtube_{country.lower()}videos"
+            if table_exists(con, legacy_table):
+                con.execute(f"DROP TABLE {legacy_table}")
+                logger.info(f'Dropped {legacy_table}, its rows now live in {VIDEOS_TABLE}.')
+    return {CATEGORIES_TABLE: reloaded} if reloaded else {}
+
+def ingest_youtube_data(force=False):
+    """Ingest changed CSV files and return how many were processed and skipped."""
+    summary = ingest_source(plan_files, apply_file, force=force, skip_failed=True, finalize=finalize)
+    logger.info('YouTube ingestion complete.')
+    return summary
+
+def stage_youtube_data(force=False):
+    """Parse changed CSV files without writing to DuckDB (see `pipeline.stage_source`)."""
+    return stage_source(plan_files, force=force, skip_failed=True)
+
+def main(force=False):
     """Main function to be called by Airflow"""
-    ingest_youtube_data()
+    return ingest_youtube_data(force=force)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
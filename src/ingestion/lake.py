@@ -0,0 +1,132 @@
+import os
+import shutil
+import uuid
+import logging
+
+from src.ingestion.csv_loader import sql_literal
+from src.ingestion.incremental import WATERMARK_COLUMNS, date_expression
+from src.ingestion.paths import DB_PATH, project_root
+
+logger = logging.getLogger(__name__)
+
+# Curated Parquet copy of the ingested tables, next to minilake.duckdb:
+#   lake/corona/<table>/date=YYYY-MM-DD/*.parquet   (date-keyed tables)
+#   lake/corona/<table>/data.parquet                (snapshot tables)
+#   lake/youtube/country=XX/*.parquet
+LAKE_DIR = os.environ.get('MINILAKE_LAKE_DIR', os.path.join(project_root, 'lake'))
+LAKE_COMPRESSION = 'zstd'
+# DuckDB's own row group size: large enough for fast scans, small enough for min/max pruning
+LAKE_ROW_GROUP_SIZE = 122_880
+
+
+def lake_layout(table_name):
+    """Where and how `table_name` is stored in the lake.
+
+    Returns a dict with the dataset directory (relative to LAKE_DIR), the hive
+    partition key and the SQL expression producing it (None for unpartitioned
+    datasets), the column the partition replaces in the files and the view name.
+    """
+    if table_name == 'youtube_videos':
+        return {
+            'dataset': 'youtube', 'key': 'country', 'expression': 'CAST(country AS VARCHAR)',
+            'replaces': 'country', 'view': 'lake_youtube_videos',
+        }
+    if table_name in WATERMARK_COLUMNS:
+        column = WATERMARK_COLUMNS[table_name]
+        return {
+            'dataset': os.path.join('corona', table_name), 'key': 'date',
+            'expression': date_expression(table_name, column), 'replaces': column, 'view': f'lake_{table_name}',
+        }
+    return {
+        'dataset': os.path.join('corona', table_name), 'key': None, 'expression': None,
+        'replaces': None, 'view': f'lake_{table_name}',
+    }
+
+
+def partition_expression(table_name):
+    """Expression identifying the lake partition of a row, for `merge_table`."""
+    return lake_layout(table_name)['expression']
+
+
+def _copy_options():
+    return f"FORMAT PARQUET, COMPRESSION {LAKE_COMPRESSION}, ROW_GROUP_SIZE {LAKE_ROW_GROUP_SIZE}"
+
+
+def export_table(con, table_name, partitions=None):
+    """Write `table_name` to the lake, replacing only the given partitions.
+
+    `partitions` lists partition values to rewrite; None rewrites the whole
+    dataset. Files are written to a staging directory inside LAKE_DIR first and
+    then moved into place, so readers never see a partially written partition.
+    """
+    layout = lake_layout(table_name)
+    dataset_dir = os.path.join(LAKE_DIR, layout['dataset'])
+    if partitions is not None and not os.path.isdir(dataset_dir):
+        partitions = None
+    if partitions is not None and len(partitions) == 0:
+        return 0
+
+    staging_dir = os.path.join(LAKE_DIR, '.staging', uuid.uuid4().hex)
+    os.makedirs(staging_dir)
+    try:
+        if layout['key'] is None:
+            staged_file = os.path.join(staging_dir, 'data.parquet')
+            con.execute(f"COPY {table_name} TO {sql_literal(staged_file)} ({_copy_options()})")
+            os.makedirs(dataset_dir, exist_ok=True)
+            os.replace(staged_file, os.path.join(dataset_dir, 'data.parquet'))
+            logger.info(f'Exported {table_name} to {dataset_dir}.')
+            return 1
+
+        exclude = f' EXCLUDE ("{layout["replaces"]}")' if layout['replaces'] else ''
+        where = ''
+        if partitions is not None:
+            values = ', '.join(sql_literal(value) for value in partitions)
+            where = f"WHERE CAST({layout['expression']} AS VARCHAR) IN ({values})"
+        con.execute(f"""
+            COPY (
+                SELECT *{exclude}, {layout['expression']} AS {layout['key']}
+                FROM {table_name}
+                {where}
+            ) TO {sql_literal(staging_dir)} ({_copy_options()}, PARTITION_BY ({layout['key']}))
+        """)
+
+        written = 0
+        staged = os.listdir(staging_dir)
+        for partition in staged:
+            target = os.path.join(dataset_dir, partition)
+            os.makedirs(dataset_dir, exist_ok=True)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            os.replace(os.path.join(staging_dir, partition), target)
+            written += 1
+        if partitions is None:
+            # A whole rewrite also drops the partitions no row maps to anymore
+            for partition in set(os.listdir(dataset_dir)) - set(staged):
+                if partition.startswith(f"{layout['key']}="):
+                    shutil.rmtree(os.path.join(dataset_dir, partition))
+        logger.info(f'Exported {written} partitions of {table_name} to {dataset_dir}.')
+        return written
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _view_source(layout):
+    # Paths are stored relative to the database directory, which the Airflow
+    # workers and the dashboard mount at different places; their connections
+    # resolve them through file_search_path (see paths.set_file_search_path).
+    relative = os.path.relpath(os.path.join(LAKE_DIR, layout['dataset']), os.path.dirname(DB_PATH))
+    if layout['key'] is None:
+        return f"read_parquet({sql_literal(os.path.join(relative, 'data.parquet'))})"
+    pattern = sql_literal(os.path.join(relative, '*', '*.parquet'))
+    return f"read_parquet({pattern}, hive_partitioning = true, union_by_name = true)"
+
+
+def create_lake_view(con, table_name):
+    """Create or replace the DuckDB view reading the lake copy of `table_name`."""
+    layout = lake_layout(table_name)
+    if not os.path.isdir(os.path.join(LAKE_DIR, layout['dataset'])):
+        return
+    select = '*'
+    if layout['key'] == 'date':
+        select = '* REPLACE (CAST(date AS DATE) AS date)'
+    con.execute(f"CREATE OR REPLACE VIEW {layout['view']} AS SELECT {select} FROM {_view_source(layout)}")
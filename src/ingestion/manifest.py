@@ -0,0 +1,98 @@
+import hashlib
+import os
+import logging
+from datetime import datetime
+
+from src.ingestion.merge import table_exists
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_TABLE = 'ingestion_manifest'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def ensure_manifest(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            path VARCHAR PRIMARY KEY,
+            size BIGINT,
+            mtime DOUBLE,
+            content_hash VARCHAR,
+            table_name VARCHAR,
+            rows_in BIGINT,
+            rows_inserted BIGINT,
+            rows_updated BIGINT,
+            ingested_at TIMESTAMP
+        )
+    """)
+
+
+def file_hash(fpath):
+    """SHA-256 of the file contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_file(con, fpath, table_name):
+    """Compare a source file with its manifest entry.
+
+    Returns `(unchanged, fingerprint)`. A file is unchanged when its size and
+    mtime match the last ingestion, or, if only the mtime moved, when its
+    content hash still matches. Files whose table has been dropped since are
+    always reported as changed so the table gets rebuilt.
+
+    Only reads from the database, so it works on a read-only connection; a file
+    that was touched without being modified is flagged with `touched` and its
+    new mtime is saved by `touch_file`.
+    """
+    fpath = os.path.abspath(fpath)
+    stat = os.stat(fpath)
+    fingerprint = {'path': fpath, 'size': stat.st_size, 'mtime': stat.st_mtime, 'content_hash': None, 'touched': False}
+
+    previous = None
+    if table_exists(con, MANIFEST_TABLE):
+        previous = con.execute(
+            f"SELECT size, mtime, content_hash FROM {MANIFEST_TABLE} WHERE path = ?", [fpath]
+        ).fetchone()
+    if previous is None or not table_exists(con, table_name):
+        fingerprint['content_hash'] = file_hash(fpath)
+        return False, fingerprint
+
+    size, mtime, content_hash = previous
+    if size == stat.st_size and mtime == stat.st_mtime:
+        fingerprint['content_hash'] = content_hash
+        return True, fingerprint
+
+    fingerprint['content_hash'] = file_hash(fpath)
+    if size == stat.st_size and content_hash == fingerprint['content_hash']:
+        fingerprint['touched'] = True
+        return True, fingerprint
+    return False, fingerprint
+
+
+def touch_file(con, fingerprint):
+    """Remember the new mtime of a touched but unmodified file to skip hashing it next time."""
+    con.execute(
+        f"UPDATE {MANIFEST_TABLE} SET mtime = ? WHERE path = ?", [fingerprint['mtime'], fingerprint['path']]
+    )
+
+
+def record_file(con, fingerprint, table_name, stats):
+    """Store the fingerprint of an ingested file with the row counts it produced."""
+    ensure_manifest(con)
+    con.execute(
+        f"""
+        INSERT INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            size = EXCLUDED.size, mtime = EXCLUDED.mtime, content_hash = EXCLUDED.content_hash,
+            table_name = EXCLUDED.table_name, rows_in = EXCLUDED.rows_in, rows_inserted = EXCLUDED.rows_inserted,
+            rows_updated = EXCLUDED.rows_updated, ingested_at = EXCLUDED.ingested_at
+        """,
+        [
+            fingerprint['path'], fingerprint['size'], fingerprint['mtime'], fingerprint['content_hash'],
+            table_name, stats['rows_in'], stats['inserted'], stats['updated'], datetime.now(),
+        ],
+    )
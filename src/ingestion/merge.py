@@ -0,0 +1,328 @@
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Deltas are sorted among themselves but appended after the rows already in a
+# table, usually out of its declared order; once the rows appended out of order
+# since the table was last sorted exceed this fraction of it, merge_table sorts
+# it again.
+RECLUSTER_FRACTION = float(os.environ.get('MINILAKE_RECLUSTER_FRACTION', 0.1))
+# Sort state of the tables merged with an `order_by`: the ordering each was
+# last sorted in and the rows appended out of it since. The greatest key of a
+# table is kept in its own column types in the one-row ORDER_KEY_PREFIX<table>.
+ORDER_TABLE = 'ingestion_table_order'
+ORDER_KEY_PREFIX = 'ingestion_order_key_'
+
+# Primary keys of the ingested tables. A row is identified by these columns;
+# when a new file contains a row whose key already exists, the new version wins.
+PRIMARY_KEYS = {
+    'day_wise': ['Date'],
+    'country_wise_latest': ['Country/Region'],
+    'worldometer_data': ['Country/Region'],
+    'usa_county_wise': ['Province_State', 'Admin2', 'Date'],
+    'full_grouped': ['Date', 'Country/Region'],
+    'covid_19_clean_complete': ['Date', 'Country/Region', 'Province/State'],
+    # Trending files list the same video once per day it was trending
+    'youtube_videos': ['country', 'video_id', 'trending_date'],
+}
+DEFAULT_PRIMARY_KEY = ['Date', 'Country/Region']
+
+
+def primary_key(table_name):
+    """Return the primary key columns declared for `table_name`."""
+    return PRIMARY_KEYS.get(table_name, DEFAULT_PRIMARY_KEY)
+
+
+def table_exists(con, table_name):
+    return con.execute(f"""
+        SELECT COUNT(*)
+        FROM information_schema.tables
+        WHERE table_name = '{table_name}'
+    """).fetchone()[0] > 0
+
+
+def table_columns(con, table_name):
+    rows = con.execute(f"""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_name = '{table_name}'
+        ORDER BY ordinal_position
+    """).fetchall()
+    return [row[0] for row in rows]
+
+
+def table_types(con, table_name):
+    """Return a dict of column name to DuckDB type for `table_name`."""
+    rows = con.execute(f"""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_name = '{table_name}'
+        ORDER BY ordinal_position
+    """).fetchall()
+    return dict(rows)
+
+
+def ensure_table_order(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ORDER_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            order_by VARCHAR,
+            appended_rows BIGINT
+        )
+    """)
+
+
+def _order_state(con, table_name):
+    if not table_exists(con, ORDER_TABLE):
+        return None, 0
+    row = con.execute(
+        f"SELECT order_by, appended_rows FROM {ORDER_TABLE} WHERE table_name = ?", [table_name]
+    ).fetchone()
+    return row or (None, 0)
+
+
+def table_order(con, table_name):
+    """The ordering the rows of `table_name` were last sorted in, None when unknown.
+
+    Recorded in ORDER_TABLE by `set_table_order`, together with the number of
+    rows appended out of that order since (`appended_rows`).
+    """
+    return _order_state(con, table_name)[0]
+
+
+def appended_rows(con, table_name):
+    """Rows inserted into `table_name` out of its `table_order` since it was last sorted."""
+    return _order_state(con, table_name)[1]
+
+
+def _descending(con, table_name, order_by):
+    # The reverse of `order_by`, whose NULLs sort last
+    columns = [row[0] for row in con.execute(f"DESCRIBE SELECT {order_by} FROM {table_name}").fetchall()]
+    return ', '.join(f'"{column}" DESC NULLS FIRST' for column in columns)
+
+
+def _save_order(con, table_name, order_by, appended):
+    # An UPDATE rather than DELETE and INSERT: before 0.10, DuckDB rejects
+    # re-inserting a deleted primary key in the same transaction
+    ensure_table_order(con)
+    updated = con.execute(
+        f"UPDATE {ORDER_TABLE} SET order_by = ?, appended_rows = ? WHERE table_name = ?",
+        [order_by, appended, table_name],
+    ).fetchone()[0]
+    if not updated:
+        con.execute(f"INSERT INTO {ORDER_TABLE} VALUES (?, ?, ?)", [table_name, order_by, appended])
+
+
+def set_table_order(con, table_name, order_by):
+    """Record that `table_name` is sorted by `order_by`, and keep its greatest key."""
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {ORDER_KEY_PREFIX}{table_name} AS
+        SELECT {order_by} FROM {table_name} ORDER BY {_descending(con, table_name, order_by)} LIMIT 1
+    """)
+    _save_order(con, table_name, order_by, 0)
+
+
+def record_append(con, table_name, delta_table, order_by, rows):
+    """Account for the `rows` of `delta_table` just inserted at the end of `table_name`.
+
+    A batch whose keys all sort after the greatest key of the table keeps it
+    in order; any other batch adds its rows to `appended_rows`, and once they
+    exceed RECLUSTER_FRACTION of the table it is sorted again by `order_by`.
+    Tables with another or no recorded order are left to
+    `schema.migrate_schemas`. Returns whether the table was sorted.
+    """
+    key_table = f'{ORDER_KEY_PREFIX}{table_name}'
+    if table_order(con, table_name) != order_by or not table_exists(con, key_table):
+        return False
+    # The batch keys are inserted next to the greatest key so that they take
+    # the table's column types; the batch is in order when that key, the
+    # first row, still sorts first
+    previous = con.execute(f"SELECT min(rowid) FROM {key_table}").fetchone()[0]
+    con.execute(f"INSERT INTO {key_table} SELECT {order_by} FROM {delta_table}")
+    first = con.execute(f"SELECT rowid FROM {key_table} ORDER BY {order_by}, rowid LIMIT 1").fetchone()[0]
+    con.execute(f"""
+        DELETE FROM {key_table} WHERE rowid <> (
+            SELECT rowid FROM {key_table} ORDER BY {_descending(con, key_table, order_by)} LIMIT 1
+        )
+    """)
+    appended = appended_rows(con, table_name) + (0 if first == previous else rows)
+    table_rows = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    if appended <= RECLUSTER_FRACTION * table_rows:
+        _save_order(con, table_name, order_by, appended)
+        return False
+    con.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM {table_name} ORDER BY {order_by}")
+    _save_order(con, table_name, order_by, 0)
+    logger.info(f"Sorted {table_name} again by {order_by} after {appended:,} rows appended out of order.")
+    return True
+
+
+def _null_safe_match(columns, left='s', right='t'):
+    return ' AND '.join(f'{left}."{col}" IS NOT DISTINCT FROM {right}."{col}"' for col in columns)
+
+
+def _key_range(con, table_name, staging_table, key_columns, alias='t'):
+    """Predicate restricting `table_name` (as `alias`) to the key range of `staging_table`.
+
+    Each key column is bounded by the lowest and highest staging value, cast
+    to the table's type, and NULL keys are kept when the staging rows have
+    some. Returns the SQL and its parameters; as constant filters, DuckDB
+    checks them against the min/max zonemap of every row group and skips the
+    row groups outside the range.
+    """
+    types = table_types(con, table_name)
+    bounds = ', '.join(
+        f'MIN(CAST("{col}" AS {types[col]})), MAX(CAST("{col}" AS {types[col]})), BOOL_OR("{col}" IS NULL)'
+        for col in key_columns
+    )
+    row = con.execute(f"SELECT {bounds} FROM {staging_table}").fetchone()
+    conditions, params = [], []
+    for i, col in enumerate(key_columns):
+        low, high, has_null = row[3 * i:3 * i + 3]
+        if low is None:
+            conditions.append(f'{alias}."{col}" IS NULL')
+            continue
+        condition = f'{alias}."{col}" BETWEEN ? AND ?'
+        params += [low, high]
+        conditions.append(f'({condition} OR {alias}."{col}" IS NULL)' if has_null else condition)
+    return ' AND '.join(conditions), params
+
+
+def merge_table(con, table_name, staging_table, key_columns=None, partition_expression=None, order_by=None):
+    """Merge the rows of `staging_table` into `table_name` and drop the staging table.
+
+    Only rows that are new or changed are written: the staging rows are
+    deduplicated on the primary key (last row of the file wins), rows already
+    present with identical values are filtered out with an anti-join, and the
+    remaining delta replaces the matching keys inside a single transaction.
+    Both the anti-join and the delete only read the target rows inside the
+    key range of the staging rows (see `_key_range`). When the range is
+    narrow on the leading column of the table's `order_by` (e.g. new dates
+    of a table ordered by date), the other row groups are skipped and the
+    work follows the size of the delta; otherwise (new dates of a table
+    ordered by country, then date) the key columns of every row group are
+    still scanned, but the other columns only for the rows in range.
+
+    Returns a dict with the number of rows read, inserted, updated and the
+    number of duplicate or unchanged rows that were skipped. When a
+    `partition_expression` is given, `changed_partitions` lists its distinct
+    values over the written rows (None when the table was created).
+    `stage_seconds` times the delta computation (`merge`), the transaction
+    writing it (`swap`) and the dropping of the work tables (`cleanup`).
+
+    `order_by` is an optional SQL ordering applied when the table is created
+    (and recorded with `set_table_order`) and to every batch of written rows,
+    so that related rows stay clustered and DuckDB's min/max zonemaps can skip
+    row groups. The batches land after the existing rows, so the table is
+    sorted again once those that do not sort after them add up to
+    RECLUSTER_FRACTION of it (see `record_append`); the time it takes counts
+    as `swap`.
+    """
+    key_columns = key_columns or primary_key(table_name)
+    start = time.perf_counter()
+    rows_in = con.execute(f"SELECT COUNT(*) FROM {staging_table}").fetchone()[0]
+
+    order_clause = f"ORDER BY {order_by}" if order_by else ''
+
+    if not table_exists(con, table_name):
+        # The staging table is usually a TEMP table, so it is copied rather than renamed
+        merged = time.perf_counter()
+        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM {staging_table} {order_clause}")
+        if order_by:
+            set_table_order(con, table_name, order_by)
+        swapped = time.perf_counter()
+        con.execute(f"DROP TABLE {staging_table}")
+        cleanup_seconds = time.perf_counter() - swapped
+        logger.info(f'Table {table_name} created in DuckDB.')
+        return {
+            'rows_in': rows_in, 'inserted': rows_in, 'updated': 0, 'duplicates': 0, 'unchanged': 0,
+            'changed_partitions': None,
+            'stage_seconds': {
+                'merge': merged - start,
+                'swap': swapped - merged,
+                'cleanup': cleanup_seconds,
+            },
+        }
+
+    columns = table_columns(con, table_name)
+    column_list = ', '.join(f'"{col}"' for col in columns)
+    key_list = ', '.join(f'"{col}"' for col in key_columns)
+    delta_table = f"{table_name}_delta"
+    in_range, range_params = _key_range(con, table_name, staging_table, key_columns)
+
+    # New or changed rows: latest staging row per key with no identical row in the table
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {delta_table} AS
+        SELECT s.*
+        FROM (
+            SELECT {column_list}
+            FROM {staging_table}
+            QUALIFY row_number() OVER (PARTITION BY {key_list} ORDER BY rowid DESC) = 1
+        ) s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM (SELECT * FROM {table_name} t WHERE {in_range}) t
+            WHERE {_null_safe_match(columns)}
+        )
+    """, range_params)
+    distinct_keys = con.execute(f"""
+        SELECT COUNT(*) FROM (SELECT DISTINCT {key_list} FROM {staging_table})
+    """).fetchone()[0]
+    delta_rows = con.execute(f"SELECT COUNT(*) FROM {delta_table}").fetchone()[0]
+
+    changed_partitions = []
+    if partition_expression and delta_rows:
+        changed_partitions = [row[0] for row in con.execute(
+            f"SELECT DISTINCT {partition_expression} FROM {delta_table}"
+        ).fetchall()]
+
+    merged = time.perf_counter()
+    updated = 0
+    if delta_rows:
+        con.execute("BEGIN TRANSACTION")
+        try:
+            updated = con.execute(f"""
+                SELECT COUNT(*) FROM {delta_table} s
+                WHERE EXISTS (
+                    SELECT 1 FROM (SELECT * FROM {table_name} t WHERE {in_range}) t
+                    WHERE {_null_safe_match(key_columns)}
+                )
+            """, range_params).fetchone()[0]
+            if updated:
+                con.execute(f"""
+                    DELETE FROM {table_name} t
+                    USING {delta_table} s
+                    WHERE {in_range} AND {_null_safe_match(key_columns)}
+                """, range_params)
+            con.execute(
+                f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {delta_table} {order_clause}"
+            )
+            if order_by:
+                record_append(con, table_name, delta_table, order_by, delta_rows)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    swapped = time.perf_counter()
+    con.execute(f"DROP TABLE IF EXISTS {delta_table}")
+    con.execute(f"DROP TABLE IF EXISTS {staging_table}")
+
+    stats = {
+        'rows_in': rows_in,
+        'inserted': delta_rows - updated,
+        'updated': updated,
+        'duplicates': rows_in - distinct_keys,
+        'unchanged': distinct_keys - delta_rows,
+        'changed_partitions': changed_partitions,
+        'stage_seconds': {
+            'merge': merged - start,
+            'swap': swapped - merged,
+            'cleanup': time.perf_counter() - swapped,
+        },
+    }
+    logger.info(
+        f"Table {table_name} merged: {stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['duplicates']} duplicates dropped."
+    )
+    return stats
@@ -0,0 +1,26 @@
+import os
+
+# Locations shared by the ingestion modules; the environment variables let
+# benchmarks and tests point a run at another data directory and database
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+DATA_DIR = os.environ.get('MINILAKE_DATA_DIR', os.path.join(project_root, 'data'))
+DB_PATH = os.environ.get('MINILAKE_DB_PATH', os.path.join(project_root, 'minilake.duckdb'))
+# Parsed files handed from the DAG staging tasks to the load task; under the
+# data directory because every Airflow worker mounts it
+STAGING_DIR = os.environ.get('MINILAKE_STAGING_DIR', os.path.join(DATA_DIR, '.staging'))
+# Read-only copies of the database published for the dashboard (see publish.py)
+PUBLISHED_DIR = os.environ.get('MINILAKE_PUBLISHED_DIR', os.path.join(os.path.dirname(DB_PATH), 'published'))
+
+
+def set_file_search_path(con, db_path=DB_PATH):
+    """Resolve the relative paths read by `con` against the directory of `db_path`.
+
+    The lake views store paths relative to the database directory (see
+    lake.py), which DuckDB resolves against `file_search_path` rather than
+    the process working directory. DuckDB 0.9 only has it as a connection
+    setting, which cursors do not inherit, so it is set on every connection
+    and cursor that may read the views. Returns `con`.
+    """
+    directory = os.path.dirname(os.path.abspath(db_path)).replace("'", "''")
+    con.execute(f"SET file_search_path = '{directory}'")
+    return con
@@ -0,0 +1,299 @@
+import os
+import shutil
+import tempfile
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import duckdb
+
+from src.ingestion.catalog import refresh_statistics
+from src.ingestion.csv_loader import stage_csv, sql_literal
+from src.ingestion.manifest import touch_file
+from src.ingestion.merge import PRIMARY_KEYS, table_exists
+from src.ingestion.paths import DB_PATH, STAGING_DIR, set_file_search_path
+from src.ingestion.publish import current_snapshot, publish
+from src.ingestion.runs import new_run_id, record_run
+from src.ingestion.schema import migrate_schemas, table_conversions
+from src.ingestion.summaries import has_changes, merge_changes, refresh_summaries
+
+logger = logging.getLogger(__name__)
+
+# Parsing runs in a bounded thread pool (DuckDB releases the GIL while reading
+# CSV files); all database writes go through a single connection.
+INGEST_WORKERS = int(os.environ.get('MINILAKE_INGEST_WORKERS', min(4, os.cpu_count() or 1)))
+# How long the writer waits for readers (e.g. the dashboard) to release the database file
+WRITER_LOCK_TIMEOUT = float(os.environ.get('MINILAKE_WRITER_LOCK_TIMEOUT', 300))
+# Staged files of DAG runs whose load never succeeded are deleted after a day
+STAGING_MAX_AGE_SECONDS = 24 * 3600
+
+
+def connect_read_only(db_path=DB_PATH):
+    """Connection used to plan a run without taking the database write lock.
+
+    Falls back to an empty in-memory database before the first ingestion.
+    """
+    if os.path.exists(db_path) and os.path.getsize(db_path) > 0:
+        return set_file_search_path(duckdb.connect(db_path, read_only=True), db_path)
+    return duckdb.connect()
+
+
+def connect_writer(db_path=DB_PATH, timeout=WRITER_LOCK_TIMEOUT):
+    """Read-write connection, retried while another process holds the file lock.
+
+    Dashboard connections are read-only and released when idle, so the lock
+    normally frees up within seconds.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while True:
+        try:
+            return set_file_search_path(duckdb.connect(db_path), db_path)
+        except duckdb.IOException as e:
+            if 'lock' not in str(e).lower() or time.monotonic() >= deadline:
+                raise
+            logger.info(f'Waiting for the lock on {db_path}...')
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+
+def drop_work_tables(con):
+    """Drop the `<table>_temp` and `<table>_new` tables older versions left in the database.
+
+    Staging tables are TEMP tables now, which disappear with their connection.
+    """
+    for table_name in PRIMARY_KEYS:
+        for work_table in (f'{table_name}_temp', f'{table_name}_new'):
+            if table_exists(con, work_table):
+                con.execute(f"DROP TABLE {work_table}")
+                logger.info(f'Dropped leftover work table {work_table}.')
+
+
+def stage_file(task, staging_dir, threads=None):
+    """Parse one planned file into a Parquet file under `staging_dir`.
+
+    `task` is a dict describing the file: `table_name`, `source` (the CSV to
+    parse, which may be a temporary tail of the real file), `encodings`,
+    `types` and `dialect`. Columns declared in `schema.TABLE_SCHEMAS` are
+    converted to their types on the way. A tail that cannot be parsed falls
+    back to parsing the whole file, as a full refresh. The staged path, row
+    count, bytes read and parse time are added to it.
+    """
+    start = time.perf_counter()
+    staged = os.path.join(staging_dir, f"{os.path.basename(task['path'])}.parquet")
+    bytes_read = os.path.getsize(task['source'])
+    try:
+        rows = _stage_task(task, staged, threads)
+    except duckdb.Error as e:
+        if not task.get('incremental'):
+            raise
+        logger.warning(f"Full refresh of {task['table_name']}: the rows appended to {task['path']} "
+                       f"could not be parsed ({e}).")
+        task = dict(task, incremental=None, types=None, dialect=None)
+        bytes_read += os.path.getsize(task['path'])
+        rows = _stage_task(dict(task, source=task['path']), staged, threads)
+    finally:
+        if task['source'] != task['path']:
+            os.remove(task['source'])
+    return dict(task, staged=staged, rows=rows, bytes_read=bytes_read, parse_seconds=time.perf_counter() - start)
+
+
+def _stage_task(task, staged, threads):
+    return stage_csv(task['source'], staged, encodings=task.get('encodings', ('utf-8',)),
+                     types=task.get('types'), threads=threads,
+                     conversions=table_conversions(task['table_name']), dialect=task.get('dialect'))
+
+
+def iter_staged(tasks, staging_dir, workers=None, skip_failed=False):
+    """Stage `tasks` in a worker pool and yield each one as soon as it is parsed."""
+    workers = max(1, min(workers or INGEST_WORKERS, len(tasks) or 1))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest') as pool:
+        futures = {pool.submit(stage_file, task, staging_dir, threads): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                if not skip_failed:
+                    raise
+                logger.error(f"Failed to ingest {os.path.basename(task['path'])}: {e}")
+
+
+def apply_staged(con, task, apply_file, keep_staged=False):
+    """Load a staged file into its `<table>_temp` TEMP table and hand it to `apply_file`.
+
+    The staged file is deleted afterwards unless `keep_staged` is set.
+    `task['extra_columns']` optionally maps column names to SQL expressions
+    added in front of the file's own columns (e.g. the source country).
+    The time spent in each of `runs.STAGES` is added as `stage_seconds`.
+    """
+    start = time.perf_counter()
+    temp_table = f"{task['table_name']}_temp"
+    extra = ''.join(f'{expression} AS "{column}", ' for column, expression in task.get('extra_columns', {}).items())
+    con.execute(
+        f"CREATE OR REPLACE TEMP TABLE {temp_table} AS "
+        f"SELECT {extra}* FROM read_parquet({sql_literal(task['staged'])})"
+    )
+    created = time.perf_counter()
+    stats = apply_file(con, task, temp_table)
+    applied = time.perf_counter()
+    if not keep_staged:
+        os.remove(task['staged'])
+    end = time.perf_counter()
+
+    merge_stages = stats.get('stage_seconds', {})
+    stage_seconds = {
+        'parse': task.get('parse_seconds', 0.0),
+        'temp_table': created - start,
+        'merge': merge_stages.get('merge', 0.0),
+        'swap': merge_stages.get('swap', 0.0),
+        'cleanup': merge_stages.get('cleanup', 0.0) + end - applied,
+        'export': applied - created - sum(merge_stages.values()),
+    }
+    return dict(task, stats=stats, merge_seconds=end - start, stage_seconds=stage_seconds)
+
+
+def collect_changes(results, finalized=None):
+    """Partitions changed by a load, per table (see `summaries.merge_changes`).
+
+    `finalized` holds the changes reported by the source's `finalize` step.
+    """
+    changes = {}
+    for result in results:
+        merge_changes(changes, result['table_name'], result['stats']['changed_partitions'])
+    for table_name, partitions in (finalized or {}).items():
+        merge_changes(changes, table_name, partitions)
+    return changes
+
+
+def run_pipeline(con, tasks, apply_file, staging_dir, workers=None, skip_failed=False, run_id=None):
+    """Parse `tasks` in parallel and apply them one by one through the writer `con`.
+
+    The timings of every file are recorded in `runs.RUNS_TABLE` under `run_id`.
+    """
+    start = time.perf_counter()
+    results = []
+    for task in iter_staged(tasks, staging_dir, workers, skip_failed):
+        results.append(apply_staged(con, task, apply_file))
+    log_timings(results, time.perf_counter() - start)
+    record_run(con, run_id or new_run_id(), results)
+    return results
+
+
+def ingest_source(plan_files, apply_file, force=False, workers=None, skip_failed=False, finalize=None,
+                  run_id=None):
+    """Run a whole ingestion in this process: plan, parse in parallel, merge.
+
+    `plan_files(con, force)` returns `(tasks, touched, skipped)` and
+    `apply_file(con, task, temp_table)` merges one staged file and returns its
+    merge stats. `finalize(con)`, if given, runs on the writer once all files
+    are merged and may return further changed partitions per table. The
+    summary tables and the statistics catalog are refreshed last, then the
+    database is published for the dashboard if anything changed. Tables whose
+    column types differ from `schema.TABLE_SCHEMAS` are converted first.
+    Per-file stage timings are recorded under `run_id`. Returns how many files
+    were processed and skipped, and the changed partitions.
+    """
+    con = connect_writer()
+    try:
+        drop_work_tables(con)
+        migrated = migrate_schemas(con)
+        tasks, touched, skipped = plan_files(con, force)
+        with tempfile.TemporaryDirectory(prefix='minilake_staging_') as staging_dir:
+            results = run_pipeline(con, tasks, apply_file, staging_dir, workers, skip_failed, run_id)
+        for fingerprint in touched:
+            touch_file(con, fingerprint)
+        changes = collect_changes(results, finalize(con) if finalize else None)
+        for table_name in migrated:
+            merge_changes(changes, table_name, None)
+        refresh_statistics(con, refresh_summaries(con, changes))
+        if has_changes(changes) or current_snapshot() is None:
+            publish(con)
+    except Exception as e:
+        logger.error(f"Error during ingestion: {str(e)}")
+        raise
+    finally:
+        con.close()
+
+    logger.info(f'{len(results)} files processed, {skipped} skipped.')
+    return {'processed': len(results), 'skipped': skipped, 'changes': changes}
+
+
+def stage_source(plan_files, force=False, workers=None, skip_failed=False):
+    """Plan and parse a source without taking the database write lock.
+
+    Used by the Airflow DAG so several sources can be parsed at the same time;
+    the returned dict is JSON serializable (it travels through XCom) and is
+    applied later by `load_staged` on the single writer connection, possibly
+    on another worker: the parsed files go to a directory under STAGING_DIR,
+    which the load task removes with `remove_staged` once it has succeeded.
+    """
+    con = connect_read_only()
+    try:
+        tasks, touched, skipped = plan_files(con, force)
+    finally:
+        con.close()
+    start = time.perf_counter()
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='minilake_staging_', dir=STAGING_DIR)
+    staged = list(iter_staged(tasks, staging_dir, workers, skip_failed))
+    return {
+        'staging_dir': staging_dir, 'tasks': staged, 'touched': touched, 'skipped': skipped,
+        'stage_seconds': time.perf_counter() - start,
+    }
+
+
+def load_staged(con, staged, apply_file, finalize=None, run_id=None):
+    """Merge the files parsed by `stage_source` through the writer `con`.
+
+    The staged files are left in place, so that a retry of a failed load
+    finds them again; see `remove_staged`. The summary tables and statistics
+    are not refreshed here: the DAG does it in its own tasks from the
+    returned `changes`. File timings are recorded under `run_id` (the Airflow
+    run id).
+    """
+    start = time.perf_counter()
+    results = [apply_staged(con, task, apply_file, keep_staged=True) for task in staged['tasks']]
+    for fingerprint in staged['touched']:
+        touch_file(con, fingerprint)
+    changes = collect_changes(results, finalize(con) if finalize else None)
+    log_timings(results, staged['stage_seconds'] + time.perf_counter() - start)
+    record_run(con, run_id or new_run_id(), results)
+    return {'processed': len(results), 'skipped': staged['skipped'], 'changes': changes}
+
+
+def remove_staged(staged_sources, max_age_seconds=STAGING_MAX_AGE_SECONDS):
+    """Delete the staging directories of `staged_sources` (`stage_source` results).
+
+    Called once every source is loaded. Directories under STAGING_DIR older
+    than `max_age_seconds`, left by runs whose load never succeeded, are
+    deleted as well.
+    """
+    for staged in staged_sources:
+        if staged:
+            shutil.rmtree(staged['staging_dir'], ignore_errors=True)
+    if not os.path.isdir(STAGING_DIR):
+        return
+    cutoff = time.time() - max_age_seconds
+    for name in os.listdir(STAGING_DIR):
+        path = os.path.join(STAGING_DIR, name)
+        if os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def log_timings(results, total_seconds):
+    """Log per-file parse and merge times and the speedup over a serial run."""
+    if not results:
+        return
+    serial_seconds = 0.0
+    for result in sorted(results, key=lambda r: r['table_name']):
+        file_seconds = result.get('parse_seconds', 0.0) + result['merge_seconds']
+        serial_seconds += file_seconds
+        stages = '  '.join(f"{stage} {seconds:6.2f}s" for stage, seconds in result['stage_seconds'].items())
+        logger.info(f"  {result['table_name']:<30} {result['rows']:>10,} rows  {stages}")
+    speedup = serial_seconds / total_seconds if total_seconds else 1.0
+    logger.info(
+        f"{len(results)} files in {total_seconds:.2f}s "
+        f"(sum of per-file times {serial_seconds:.2f}s, {speedup:.1f}x)"
+    )
@@ -0,0 +1,120 @@
+import os
+import time
+import shutil
+import logging
+from datetime import datetime
+
+from src.ingestion.paths import DB_PATH, PUBLISHED_DIR
+
+logger = logging.getLogger(__name__)
+
+# Blue/green publishing: ingestion writes minilake.duckdb, then copies it into
+# PUBLISHED_DIR as a new immutable snapshot and points CURRENT at it with an
+# atomic rename. The dashboard only opens the current snapshot read-only, so it
+# never holds a lock on the file being written nor sees a load half applied.
+#
+# Limitations:
+# - Every snapshot is a full copy of the database file, so with PUBLISHED_KEEP
+#   older snapshots the published directory and minilake.duckdb take about
+#   (2 + PUBLISHED_KEEP) times its size, one more copy while a publish runs,
+#   and more when several loads land within PUBLISHED_GRACE_SECONDS.
+# - Only the tables are snapshotted. The lake_* views of every snapshot read
+#   the Parquet files under LAKE_DIR, which loads rewrite in place, so on an
+#   older snapshot they can return newer rows than its tables.
+CURRENT_FILE = 'CURRENT'
+SNAPSHOT_PREFIX = 'minilake-'
+SNAPSHOT_SUFFIX = '.duckdb'
+# Snapshots kept besides the current one, and how long superseded snapshots
+# (and unfinished copies) are left for readers that still have them open
+PUBLISHED_KEEP = int(os.environ.get('MINILAKE_PUBLISHED_KEEP', 1))
+PUBLISHED_GRACE_SECONDS = float(os.environ.get('MINILAKE_PUBLISHED_GRACE_SECONDS', 600))
+
+
+def current_snapshot(published_dir=PUBLISHED_DIR):
+    """Path of the snapshot readers should open, None before the first publish."""
+    try:
+        with open(os.path.join(published_dir, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(published_dir, name)
+    return path if name and os.path.exists(path) else None
+
+
+def _replace_atomically(path, write):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def publish(con, db_path=DB_PATH, published_dir=PUBLISHED_DIR):
+    """Publish the current contents of the database as a new snapshot.
+
+    `con` is the writer connection: it is checkpointed so the database file
+    holds every committed change, and keeps other writers out during the copy.
+    Superseded snapshots are collected afterwards. Returns the snapshot path.
+    """
+    start = time.perf_counter()
+    con.execute("CHECKPOINT")
+    os.makedirs(published_dir, exist_ok=True)
+    name = f'{SNAPSHOT_PREFIX}{datetime.now():%Y%m%dT%H%M%S%f}{SNAPSHOT_SUFFIX}'
+    path = os.path.join(published_dir, name)
+
+    def copy(dst):
+        with open(db_path, 'rb') as src:
+            shutil.copyfileobj(src, dst, 16 * 1024 * 1024)
+
+    _replace_atomically(path, copy)
+    _replace_atomically(os.path.join(published_dir, CURRENT_FILE), lambda f: f.write(name.encode()))
+    logger.info(
+        f'Published {name} ({os.path.getsize(path) / 1024 ** 2:,.1f} MiB) in {time.perf_counter() - start:.2f}s.'
+    )
+    collect_snapshots(published_dir)
+    return path
+
+
+def collect_snapshots(published_dir=PUBLISHED_DIR, keep=PUBLISHED_KEEP, grace_seconds=PUBLISHED_GRACE_SECONDS):
+    """Delete superseded snapshots and copies left behind by an interrupted publish.
+
+    The current snapshot and the `keep` newest before it are never deleted;
+    older ones only once they were superseded `grace_seconds` ago, so readers
+    get time to move to the current one. Returns the deleted file names.
+    """
+    if not os.path.isdir(published_dir):
+        return []
+    current = current_snapshot(published_dir)
+    current_name = os.path.basename(current) if current else None
+    snapshots = sorted(
+        (name for name in os.listdir(published_dir)
+         if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)),
+        reverse=True,
+    )
+    older = [name for name in snapshots if current_name is None or name < current_name]
+    leftovers = [name for name in os.listdir(published_dir) if name.endswith('.tmp')]
+
+    cutoff = time.time() - grace_seconds
+    expired = [name for name in older[keep:] if _superseded_at(published_dir, name, snapshots) < cutoff]
+    expired += [name for name in leftovers if _mtime(os.path.join(published_dir, name)) < cutoff]
+    for name in expired:
+        for path in (os.path.join(published_dir, name), os.path.join(published_dir, f'{name}.wal')):
+            if os.path.exists(path):
+                os.remove(path)
+    if expired:
+        logger.info(f'Deleted {len(expired)} superseded snapshots and leftovers from {published_dir}.')
+    return expired
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return time.time()
+
+
+def _superseded_at(published_dir, name, snapshots):
+    """When the snapshot published after `name` was written."""
+    newer = [other for other in snapshots if other > name]
+    return _mtime(os.path.join(published_dir, min(newer))) if newer else time.time()
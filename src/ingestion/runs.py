@@ -0,0 +1,76 @@
+import os
+import uuid
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# One row per ingested file and run, with the time spent in each stage
+RUNS_TABLE = 'ingestion_runs'
+# parse: CSV to staged Parquet; temp_table: staged file into <table>_temp;
+# merge: delta against the table; swap: the transaction writing the delta;
+# cleanup: dropping work tables and staged files; export: the rest of the
+# source's apply step (lake export, manifest and watermark bookkeeping).
+STAGES = ['parse', 'temp_table', 'merge', 'swap', 'cleanup', 'export']
+
+
+def ensure_runs(con):
+    stage_columns = ', '.join(f'{stage}_seconds DOUBLE' for stage in STAGES)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+            run_id VARCHAR,
+            path VARCHAR,
+            table_name VARCHAR,
+            recorded_at TIMESTAMP,
+            bytes_read BIGINT,
+            rows_in BIGINT,
+            rows_inserted BIGINT,
+            rows_updated BIGINT,
+            duplicates BIGINT,
+            rows_unchanged BIGINT,
+            {stage_columns},
+            total_seconds DOUBLE,
+            PRIMARY KEY (run_id, path)
+        )
+    """)
+
+
+def new_run_id():
+    """Identifier of a run started outside Airflow, sortable by start time."""
+    return f"manual__{datetime.now():%Y-%m-%dT%H:%M:%S}_{uuid.uuid4().hex[:8]}"
+
+
+def record_run(con, run_id, results):
+    """Store the per-stage timings and row counts of the files applied by a run.
+
+    `results` are the dicts returned by `pipeline.apply_staged`. A retried run
+    overwrites the entries of the files it applies again.
+    """
+    if not results:
+        return
+    ensure_runs(con)
+    recorded_at = datetime.now()
+    rows = []
+    for result in results:
+        stats, seconds = result['stats'], result['stage_seconds']
+        rows.append([
+            run_id, result['path'], result['table_name'], recorded_at, result.get('bytes_read'),
+            stats['rows_in'], stats['inserted'], stats['updated'], stats.get('duplicates'), stats.get('unchanged'),
+            *(seconds[stage] for stage in STAGES),
+            sum(seconds.values()),
+        ])
+    placeholders = ', '.join('?' * len(rows[0]))
+    # DuckDB 0.9 cannot infer the conflict target of INSERT OR REPLACE on a
+    # composite primary key, so it is spelled out
+    columns = [row[0] for row in con.execute(f"DESCRIBE {RUNS_TABLE}").fetchall()]
+    updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns if column not in ('run_id', 'path'))
+    con.executemany(
+        f"INSERT INTO {RUNS_TABLE} VALUES ({placeholders}) ON CONFLICT (run_id, path) DO UPDATE SET {updates}",
+        rows,
+    )
+    slowest = max(results, key=lambda r: sum(r['stage_seconds'].values()))
+    stage, seconds = max(slowest['stage_seconds'].items(), key=lambda item: item[1])
+    logger.info(
+        f"Run {run_id}: {len(rows)} files recorded in {RUNS_TABLE}; slowest is "
+        f"{os.path.basename(slowest['path'])}, mostly {stage} ({seconds:.2f}s)."
+    )
@@ -0,0 +1,202 @@
+import logging
+
+from src.ingestion.incremental import DATE_FORMATS, parse_date
+from src.ingestion.lake import create_lake_view, export_table
+from src.ingestion.merge import set_table_order, table_exists, table_order, table_types
+
+logger = logging.getLogger(__name__)
+
+# Declared column types of the ingested tables. Declared columns are read as
+# text and converted by DuckDB while each file is staged, in one vectorized
+# pass, so every file of a table yields the same types whatever read_csv would
+# sniff from it; undeclared columns keep the sniffed type. Values that do not
+# convert become NULL. DuckDB stores VARCHAR columns with few distinct values
+# per row group (country and region names, channel titles) dictionary
+# compressed, as does the Parquet lake.
+COUNTS = ['Confirmed', 'Deaths', 'Recovered', 'Active', 'New cases', 'New deaths', 'New recovered']
+RATIOS = ['Deaths / 100 Cases', 'Recovered / 100 Cases', 'Deaths / 100 Recovered']
+
+TABLE_SCHEMAS = {
+    'day_wise': {
+        'Date': 'DATE',
+        **{column: 'INTEGER' for column in COUNTS},
+        **{column: 'DOUBLE' for column in RATIOS},
+        'No. of countries': 'SMALLINT',
+    },
+    'country_wise_latest': {
+        'Country/Region': 'VARCHAR',
+        **{column: 'INTEGER' for column in COUNTS},
+        **{column: 'DOUBLE' for column in RATIOS},
+        'Confirmed last week': 'INTEGER',
+        '1 week change': 'INTEGER',
+        '1 week % increase': 'DOUBLE',
+        'WHO Region': 'VARCHAR',
+    },
+    'worldometer_data': {
+        'Country/Region': 'VARCHAR',
+        'Continent': 'VARCHAR',
+        'Population': 'BIGINT',
+        'TotalCases': 'INTEGER',
+        'NewCases': 'INTEGER',
+        'TotalDeaths': 'INTEGER',
+        'NewDeaths': 'INTEGER',
+        'TotalRecovered': 'INTEGER',
+        'NewRecovered': 'INTEGER',
+        'ActiveCases': 'INTEGER',
+        'Serious,Critical': 'INTEGER',
+        'Tot Cases/1M pop': 'DOUBLE',
+        'Deaths/1M pop': 'DOUBLE',
+        'TotalTests': 'BIGINT',
+        'Tests/1M pop': 'DOUBLE',
+        'WHO Region': 'VARCHAR',
+    },
+    'usa_county_wise': {
+        'UID': 'BIGINT',
+        'iso2': 'VARCHAR',
+        'iso3': 'VARCHAR',
+        'code3': 'SMALLINT',
+        'FIPS': 'INTEGER',
+        'Admin2': 'VARCHAR',
+        'Province_State': 'VARCHAR',
+        'Country_Region': 'VARCHAR',
+        'Lat': 'DOUBLE',
+        'Long_': 'DOUBLE',
+        'Combined_Key': 'VARCHAR',
+        'Date': 'DATE',
+        'Confirmed': 'INTEGER',
+        'Deaths': 'INTEGER',
+    },
+    'full_grouped': {
+        'Date': 'DATE',
+        'Country/Region': 'VARCHAR',
+        **{column: 'INTEGER' for column in COUNTS},
+        'WHO Region': 'VARCHAR',
+    },
+    'covid_19_clean_complete': {
+        'Province/State': 'VARCHAR',
+        'Country/Region': 'VARCHAR',
+        'Lat': 'DOUBLE',
+        'Long': 'DOUBLE',
+        'Date': 'DATE',
+        **{column: 'INTEGER' for column in COUNTS[:4]},
+        'WHO Region': 'VARCHAR',
+    },
+    'youtube_videos': {
+        'video_id': 'VARCHAR',
+        'trending_date': 'DATE',
+        'title': 'VARCHAR',
+        'channel_title': 'VARCHAR',
+        'category_id': 'SMALLINT',
+        'publish_time': 'TIMESTAMP',
+        'tags': 'VARCHAR',
+        'views': 'BIGINT',
+        'likes': 'BIGINT',
+        'dislikes': 'BIGINT',
+        'comment_count': 'BIGINT',
+        'thumbnail_link': 'VARCHAR',
+        'comments_disabled': 'BOOLEAN',
+        'ratings_disabled': 'BOOLEAN',
+        'video_error_or_removed': 'BOOLEAN',
+        'description': 'VARCHAR',
+    },
+}
+
+# Dates in DATE_FORMATS formats that earlier versions read as ISO 8601, and
+# how to recover them: '2/5/20' was stored as 0002-05-20, its month, day and
+# year in the year, month and day fields
+MISREAD_DATES = {
+    '%m/%d/%y': 'make_date(2000 + day({column}), year({column}), month({column}))',
+}
+
+
+# Physical row order of the tables read by key ranges. Tables are built in this
+# order and every merged delta is inserted in it, so DuckDB's per row group
+# min/max (zonemaps) let a filter on the leading columns skip almost every row
+# group, e.g. one country's or one county's time series.
+TABLE_ORDER = {
+    'full_grouped': ['Country/Region', 'Date'],
+    'covid_19_clean_complete': ['Country/Region', 'Province/State', 'Date'],
+    'usa_county_wise': ['Province_State', 'Admin2', 'Date'],
+    'youtube_videos': ['country', 'trending_date'],
+}
+
+
+def order_by(table_name):
+    """ORDER BY expression list of `table_name` (see TABLE_ORDER), None when unordered."""
+    columns = TABLE_ORDER.get(table_name)
+    return ', '.join(f'"{column}"' for column in columns) if columns else None
+
+
+def conversion_template(table_name, column):
+    """SQL template converting the text of `column` to its declared type.
+
+    The `{column}` placeholder stands for the (quoted) text value. Timestamps
+    are stored in UTC.
+    """
+    dtype = TABLE_SCHEMAS[table_name][column]
+    if dtype == 'VARCHAR':
+        return '{column}'
+    if dtype == 'TIMESTAMP':
+        return "timezone('UTC', TRY_CAST({column} AS TIMESTAMPTZ))"
+    date_format = DATE_FORMATS.get((table_name, column))
+    if date_format:
+        return parse_date('{column}', date_format)
+    return f'TRY_CAST({{column}} AS {dtype})'
+
+
+def table_conversions(table_name):
+    """Conversion template of every declared column of `table_name` (see `csv_loader.load_csv`)."""
+    return {column: conversion_template(table_name, column) for column in TABLE_SCHEMAS.get(table_name, {})}
+
+
+def repair_dates(con, table_name):
+    """Recover the MISREAD_DATES of `table_name`. Returns the number of rows fixed."""
+    fixed = 0
+    for (table, column), date_format in DATE_FORMATS.items():
+        if table != table_name or date_format not in MISREAD_DATES:
+            continue
+        if table_types(con, table_name).get(column) != 'DATE':
+            continue
+        repair = MISREAD_DATES[date_format].format(column=f'"{column}"')
+        count = con.execute(f'SELECT COUNT(*) FROM {table_name} WHERE year("{column}") < 100').fetchone()[0]
+        if count:
+            con.execute(f'UPDATE {table_name} SET "{column}" = {repair} WHERE year("{column}") < 100')
+            logger.info(f'Repaired {count:,} {column} values of {table_name} read with the wrong date format.')
+            fixed += count
+    return fixed
+
+
+def migrate_schemas(con):
+    """Bring existing tables to their declared column types and row order.
+
+    Columns whose type differs are converted, dates misread by earlier
+    versions repaired, and tables not written in their TABLE_ORDER are
+    rewritten sorted. The lake copy of a migrated table is
+    rewritten. Returns the migrated tables, whose summaries and statistics the
+    caller refreshes as for a wholly changed table.
+    """
+    migrated = []
+    for table_name, schema in TABLE_SCHEMAS.items():
+        if not table_exists(con, table_name):
+            continue
+        types = table_types(con, table_name)
+        changed = [column for column, dtype in schema.items() if column in types and types[column] != dtype]
+        for column in changed:
+            template = conversion_template(table_name, column)
+            using = template.format(column=f'CAST("{column}" AS VARCHAR)')
+            con.execute(f'ALTER TABLE {table_name} ALTER "{column}" TYPE {schema[column]} USING {using}')
+        if changed:
+            logger.info(f"Converted {table_name} columns {', '.join(changed)} to their declared types.")
+        repaired = repair_dates(con, table_name)
+        order = order_by(table_name)
+        # Converted or repaired keys also renew the greatest key kept with the order
+        reordered = order is not None and (changed or repaired or table_order(con, table_name) != order)
+        if reordered:
+            con.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM {table_name} ORDER BY {order}")
+            set_table_order(con, table_name, order)
+            logger.info(f"Rewrote {table_name} ordered by {order}.")
+        if changed or repaired or reordered:
+            export_table(con, table_name)
+            create_lake_view(con, table_name)
+            migrated.append(table_name)
+    return migrated
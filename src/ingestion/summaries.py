@@ -0,0 +1,337 @@
+import time
+import logging
+
+from src.ingestion.csv_loader import sql_literal
+from src.ingestion.merge import table_columns, table_exists
+
+logger = logging.getLogger(__name__)
+
+# Rows kept per country in the ranked YouTube summaries (the dashboard shows 5-10)
+SUMMARY_TOP_N = 50
+# Outliers kept per country for the box plot (a stable sample plus the extremes)
+SUMMARY_MAX_OUTLIERS = 200
+# Bins per country of the engagement rate histogram
+HISTOGRAM_BINS = 40
+
+# Videos with their category name and engagement rate (%), restricted by {filter}
+YOUTUBE_VIDEOS = """
+    SELECT
+        CAST(v.country AS VARCHAR) AS country,
+        v.* EXCLUDE (country),
+        COALESCE(c.category_name, CAST(v.category_id AS VARCHAR)) AS category_name,
+        CAST(v.likes + v.comment_count AS DOUBLE) / NULLIF(v.views, 0) * 100 AS engagement_rate
+    FROM youtube_videos v
+    LEFT JOIN youtube_categories c ON c.country = v.country AND c.category_id = v.category_id
+    WHERE {filter}
+"""
+
+# Quartiles and 1.5 IQR bounds of the finite engagement rates of each country
+ENGAGEMENT_BOUNDS = """
+    SELECT
+        country, q1, median, q3,
+        q1 - 1.5 * (q3 - q1) AS lower_bound,
+        q3 + 1.5 * (q3 - q1) AS upper_bound
+    FROM (
+        SELECT
+            country,
+            quantile_cont(engagement_rate, 0.25) AS q1,
+            quantile_cont(engagement_rate, 0.5) AS median,
+            quantile_cont(engagement_rate, 0.75) AS q3
+        FROM videos
+        WHERE isfinite(engagement_rate)
+        GROUP BY country
+    )
+"""
+
+# Summary tables read by the dashboard. Each one is rebuilt from `query` when
+# one of its `sources` changed. Partitioned summaries have a `key` column
+# holding the partition values reported by the merge (a country, a date), and
+# `filter` is the expression matching them inside the query: only the changed
+# partitions are recomputed. Unpartitioned summaries are always rebuilt whole.
+SUMMARIES = {
+    'summary_corona_global': {
+        'sources': ['worldometer_data'], 'key': None, 'filter': None,
+        'query': """
+            SELECT
+                SUM("TotalCases") AS total_cases,
+                SUM("TotalDeaths") AS total_deaths,
+                SUM("TotalRecovered") AS total_recovered,
+                SUM("ActiveCases") AS active_cases
+            FROM worldometer_data
+        """,
+    },
+    'summary_corona_countries': {
+        'sources': ['worldometer_data'], 'key': None, 'filter': None,
+        'query': """
+            SELECT
+                "Country/Region" AS country_region,
+                "TotalCases" AS total_cases,
+                "TotalDeaths" AS total_deaths,
+                "TotalRecovered" AS total_recovered,
+                "ActiveCases" AS active_cases,
+                "Population" AS population,
+                "TotalCases"::FLOAT / NULLIF("Population", 0) * 100 AS cases_per_population,
+                "TotalRecovered"::FLOAT / NULLIF("TotalCases", 0) * 100 AS recovery_rate,
+                "TotalDeaths"::FLOAT / NULLIF("TotalCases", 0) * 100 AS death_rate
+            FROM worldometer_data
+            ORDER BY total_cases DESC
+        """,
+    },
+    'summary_corona_daily': {
+        'sources': ['day_wise'], 'key': 'date', 'filter': '"Date"',
+        'query': """
+            SELECT
+                "Date" AS date,
+                SUM("New cases") AS new_cases,
+                SUM("New deaths") AS new_deaths,
+                SUM("New recovered") AS new_recovered
+            FROM day_wise
+            WHERE {filter}
+            GROUP BY 1
+            ORDER BY 1
+        """,
+    },
+    'summary_youtube_metrics': {
+        'sources': ['youtube_videos', 'youtube_categories'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS}),
+            categories AS (
+                SELECT country, category_name AS most_popular_category
+                FROM videos
+                GROUP BY country, category_name
+                QUALIFY row_number() OVER (PARTITION BY country ORDER BY COUNT(*) DESC, category_name) = 1
+            )
+            SELECT
+                m.country, m.total_videos, m.total_views, c.most_popular_category, m.avg_engagement
+            FROM (
+                SELECT
+                    country,
+                    COUNT(*) AS total_videos,
+                    SUM(views) AS total_views,
+                    AVG(engagement_rate) AS avg_engagement
+                FROM videos
+                GROUP BY country
+            ) m
+            LEFT JOIN categories c USING (country)
+        """,
+    },
+    'summary_youtube_categories': {
+        'sources': ['youtube_videos', 'youtube_categories'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS})
+            SELECT
+                country,
+                category_name,
+                COUNT(video_id) AS video_count,
+                AVG(views) AS avg_views,
+                AVG(likes) AS avg_likes,
+                AVG(comment_count) AS avg_comments
+            FROM videos
+            GROUP BY country, category_name
+        """,
+    },
+    'summary_youtube_channels': {
+        'sources': ['youtube_videos'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS})
+            SELECT
+                country,
+                row_number() OVER (PARTITION BY country ORDER BY SUM(views) DESC, channel_title) AS rank,
+                channel_title,
+                SUM(views) AS total_views,
+                COUNT(video_id) AS video_count
+            FROM videos
+            GROUP BY country, channel_title
+            QUALIFY rank <= {SUMMARY_TOP_N}
+        """,
+    },
+    'summary_youtube_monthly': {
+        'sources': ['youtube_videos'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS})
+            SELECT country, strftime(month, '%Y-%m') AS month, video_count
+            FROM (
+                SELECT
+                    country,
+                    date_trunc('month', publish_time) AS month,
+                    COUNT(video_id) AS video_count
+                FROM videos
+                GROUP BY 1, 2
+            )
+            WHERE month IS NOT NULL
+        """,
+    },
+    'summary_youtube_top_videos': {
+        'sources': ['youtube_videos'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS})
+            SELECT * FROM (
+                SELECT
+                    country, 'views' AS ranking,
+                    row_number() OVER (PARTITION BY country ORDER BY views DESC) AS rank,
+                    title, views, engagement_rate
+                FROM videos
+                WHERE views IS NOT NULL
+                QUALIFY rank <= {SUMMARY_TOP_N}
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT
+                    country, 'engagement_rate' AS ranking,
+                    row_number() OVER (PARTITION BY country ORDER BY engagement_rate DESC) AS rank,
+                    title, views, engagement_rate
+                FROM videos
+                WHERE engagement_rate IS NOT NULL
+                QUALIFY rank <= {SUMMARY_TOP_N}
+            )
+        """,
+    },
+    'summary_youtube_engagement': {
+        'sources': ['youtube_videos'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS}),
+            stats AS ({ENGAGEMENT_BOUNDS})
+            SELECT
+                s.country, s.q1, s.median, s.q3,
+                MIN(v.engagement_rate) FILTER (WHERE v.engagement_rate >= s.lower_bound) AS lower_fence,
+                MAX(v.engagement_rate) FILTER (WHERE v.engagement_rate <= s.upper_bound) AS upper_fence,
+                COUNT(*) FILTER (WHERE v.engagement_rate NOT BETWEEN s.lower_bound AND s.upper_bound) AS outlier_count
+            FROM videos v
+            JOIN stats s USING (country)
+            WHERE isfinite(v.engagement_rate)
+            GROUP BY s.country, s.q1, s.median, s.q3
+        """,
+    },
+    'summary_youtube_engagement_outliers': {
+        'sources': ['youtube_videos'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS}),
+            stats AS ({ENGAGEMENT_BOUNDS})
+            SELECT v.country, v.title, v.engagement_rate
+            FROM videos v
+            JOIN stats s USING (country)
+            WHERE isfinite(v.engagement_rate) AND v.engagement_rate NOT BETWEEN s.lower_bound AND s.upper_bound
+            QUALIFY row_number() OVER (PARTITION BY v.country ORDER BY hash(v.video_id, v.trending_date))
+                    <= {SUMMARY_MAX_OUTLIERS}
+                OR row_number() OVER (PARTITION BY v.country ORDER BY v.engagement_rate) = 1
+                OR row_number() OVER (PARTITION BY v.country ORDER BY v.engagement_rate DESC) = 1
+        """,
+    },
+    'summary_youtube_engagement_histogram': {
+        'sources': ['youtube_videos'], 'key': 'country', 'filter': 'v.country',
+        'query': f"""
+            WITH videos AS ({YOUTUBE_VIDEOS}),
+            stats AS ({ENGAGEMENT_BOUNDS}),
+            bounds AS (
+                SELECT v.country, MIN(v.engagement_rate) AS low, MAX(v.engagement_rate) AS high
+                FROM videos v
+                JOIN stats s USING (country)
+                WHERE v.engagement_rate BETWEEN s.lower_bound AND s.upper_bound
+                GROUP BY v.country
+            ),
+            binned AS (
+                SELECT
+                    v.country, b.low, (b.high - b.low) / {HISTOGRAM_BINS} AS width,
+                    COALESCE(LEAST(
+                        CAST(floor(
+                            (v.engagement_rate - b.low) / NULLIF(b.high - b.low, 0) * {HISTOGRAM_BINS}
+                        ) AS INTEGER),
+                        {HISTOGRAM_BINS - 1}
+                    ), 0) AS bin
+                FROM videos v
+                JOIN bounds b USING (country)
+                WHERE v.engagement_rate BETWEEN b.low AND b.high
+            )
+            SELECT
+                country, bin,
+                low + bin * width AS bin_start,
+                low + (bin + 1) * width AS bin_end,
+                COUNT(*) AS video_count
+            FROM binned
+            GROUP BY country, bin, low, width
+        """,
+    },
+}
+
+
+def merge_changes(changes, table_name, partitions):
+    """Add the partitions changed in `table_name` to `changes`.
+
+    `changes` maps table names to lists of changed partition values (as
+    strings, so they can travel through XCom), or None when the whole table
+    changed. None absorbs any partition list.
+    """
+    if partitions is None:
+        changes[table_name] = None
+    elif table_name not in changes:
+        changes[table_name] = sorted({str(value) for value in partitions})
+    elif changes[table_name] is not None:
+        changes[table_name] = sorted(set(changes[table_name]) | {str(value) for value in partitions})
+    return changes
+
+
+def has_changes(changes):
+    """True when `changes` (see `merge_changes`) holds a changed table or partition."""
+    return any(partitions is None or partitions for partitions in (changes or {}).values())
+
+
+def _summary_partitions(summary, changes, current):
+    """Partitions of `summary` to recompute: None for all of them, [] for none."""
+    if not current:
+        return None
+    partitions = set()
+    for source in summary['sources']:
+        if source not in changes or changes[source] == []:
+            continue
+        if changes[source] is None or summary['key'] is None:
+            return None
+        partitions.update(changes[source])
+    return sorted(partitions)
+
+
+def _summary_columns(con, summary):
+    query = summary['query'].replace('{filter}', 'FALSE')
+    return [row[0] for row in con.execute(f"DESCRIBE {query}").fetchall()]
+
+
+def refresh_summary(con, name, partitions=None):
+    """Recompute the summary table `name`, only for `partitions` when given."""
+    summary = SUMMARIES[name]
+    if partitions is None:
+        query = summary['query'].replace('{filter}', 'TRUE')
+        con.execute(f"CREATE OR REPLACE TABLE {name} AS {query}")
+        return
+    values = ', '.join(sql_literal(value) for value in partitions)
+    query = summary['query'].replace('{filter}', f"CAST({summary['filter']} AS VARCHAR) IN ({values})")
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(f"DELETE FROM {name} WHERE CAST({summary['key']} AS VARCHAR) IN ({values})")
+        con.execute(f"INSERT INTO {name} {query}")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def refresh_summaries(con, changes):
+    """Bring the summary tables up to date after a load.
+
+    `changes` is the dict built with `merge_changes`. Summaries whose sources
+    did not change are left alone; missing summaries, and summaries whose
+    columns changed since they were built, are built from scratch.
+    Returns a copy of `changes` that also lists the refreshed summaries.
+    """
+    changes = dict(changes)
+    for name, summary in SUMMARIES.items():
+        if not all(table_exists(con, source) for source in summary['sources']):
+            continue
+        current = table_exists(con, name) and table_columns(con, name) == _summary_columns(con, summary)
+        partitions = _summary_partitions(summary, changes, current)
+        if partitions == []:
+            continue
+        start = time.perf_counter()
+        refresh_summary(con, name, partitions)
+        merge_changes(changes, name, partitions)
+        scope = 'all partitions' if partitions is None else f'{len(partitions)} partitions'
+        logger.info(f'Refreshed {name} ({scope}) in {time.perf_counter() - start:.2f}s.')
+    return changes
@@ -0,0 +1,43 @@
+import os
+import threading
+
+import streamlit as st
+
+from src.visualization.connection import cursor
+from src.visualization.instrumentation import InstrumentedConnection, query_context, timed
+
+# Query results are cached per process and shared by all sessions. Keys include
+# the data version, so results of different versions never mix; the prefetcher
+# fills the entries of a new version while the previous one is still served
+# (see prefetch.py), and the least recently used entries, such as those of
+# superseded versions, are evicted past CACHE_MAX_ENTRIES.
+CACHE_MAX_ENTRIES = int(os.environ.get('MINILAKE_CACHE_ENTRIES', 1024))
+
+# Set by _cached_call in the calling thread, i.e. when the result was not cached
+_local = threading.local()
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_call(_query, query_name, version, args, kwargs):
+    _local.computed = True
+    with cursor() as con, query_context(_query.__name__):
+        return _query(InstrumentedConnection(con), *args, **kwargs)
+
+
+def cached(query, version, *args, **kwargs):
+    """Run `query(con, *args, **kwargs)` on a shared cursor or return its cached
+    result for `version` (see `connection.data_version`).
+
+    Arguments must be hashable by Streamlit.
+    """
+    query_name = f'{query.__module__}.{query.__qualname__}'
+    _local.computed = False
+    with timed('call', query.__name__) as fields:
+        result = _cached_call(query, query_name, version, args, kwargs)
+        fields['cached'] = not _local.computed
+    return result
+
+
+def clear_cache():
+    """Forget every cached result, e.g. after the dashboard itself changed a table."""
+    _cached_call.clear()
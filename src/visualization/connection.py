@@ -0,0 +1,258 @@
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+import duckdb
+
+from src.ingestion.paths import set_file_search_path
+from src.ingestion.publish import current_snapshot, publish
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('MINILAKE_DB_PATH', '/app/minilake.duckdb')
+# Queries read the snapshot the ingestion last published here (see
+# src/ingestion/publish.py), and minilake.duckdb itself before the first one
+PUBLISHED_DIR = os.environ.get('MINILAKE_PUBLISHED_DIR', os.path.join(os.path.dirname(DB_PATH), 'published'))
+DB_THREADS = os.environ.get('MINILAKE_DB_THREADS')
+DB_MEMORY_LIMIT = os.environ.get('MINILAKE_DB_MEMORY_LIMIT')
+# A read-only connection still holds a shared lock on its file, which would keep
+# the Airflow writer out of minilake.duckdb; it is closed once no query has run
+# for this long.
+IDLE_SECONDS = float(os.environ.get('MINILAKE_DB_IDLE_SECONDS', 5))
+
+# One read-only connection per process, shared by all sessions through cursors
+_lock = threading.Condition()
+_connection = None
+_path = None
+_version = None
+_in_use = 0
+# Dashboard writes in progress on DB_PATH, which readers cannot open meanwhile
+_writing = 0
+# Serializes the dashboard writes, which the readers do not wait for
+_write_lock = threading.Lock()
+_last_used = 0.0
+_idle_timer = None
+# Snapshot served to the sessions, (path, version), pinned by the prefetcher
+# (see prefetch.py) until the page queries of the next one are cached; None
+# serves whatever was published last, or minilake.duckdb once `pin` was called
+_served = None
+_pinned = False
+# Private connection of a thread filling the cache ahead of serving (see `reading`)
+_local = threading.local()
+
+
+def _read_target():
+    """Database file readers should open and the version of its contents.
+
+    A published snapshot never changes, so its name is its version. Without
+    one, the version is built from the inode, size and modification time of
+    minilake.duckdb and of its write-ahead log, which change whenever a writer
+    commits or the file is replaced.
+    """
+    snapshot = current_snapshot(PUBLISHED_DIR)
+    if snapshot is not None:
+        return snapshot, os.path.basename(snapshot)
+    return _database_target()
+
+
+def _database_target():
+    version = []
+    for path in (DB_PATH, f'{DB_PATH}.wal'):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        version.append(f'{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}')
+    return DB_PATH, '|'.join(version)
+
+
+def _served_target():
+    served = _served
+    if served is not None and os.path.exists(served[0]):
+        return served
+    if served is None and _pinned:
+        return _database_target()
+    return _read_target()
+
+
+def data_version():
+    """Identifies the data readers currently see; it changes after every load."""
+    return _served_target()[1]
+
+
+def latest_snapshot():
+    """(path, version) of the snapshot published last, None before the first publish."""
+    snapshot = current_snapshot(PUBLISHED_DIR)
+    return (snapshot, os.path.basename(snapshot)) if snapshot is not None else None
+
+
+def pin():
+    """Keep serving what the sessions read now until `serve` moves them on.
+
+    That is the snapshot published last, or minilake.duckdb before the first
+    publish: snapshots published from now on are not read before being served.
+    """
+    global _pinned
+    snapshot = latest_snapshot()
+    with _lock:
+        _pinned = True
+        if snapshot is not None:
+            _serve(snapshot)
+
+
+def serve(snapshot):
+    """Serve `snapshot` (a `latest_snapshot()` value) to the sessions from now on.
+
+    A snapshot older than the one served is ignored, so a slow prefetch never
+    takes the dashboard back in time. Snapshot names are their publication
+    timestamps, so they compare in publication order.
+    """
+    with _lock:
+        _serve(snapshot)
+
+
+def _serve(snapshot):
+    global _served
+    if _served is None or snapshot[1] > _served[1]:
+        _served = snapshot
+
+
+def _open(path, read_only):
+    config = {}
+    if DB_THREADS:
+        config['threads'] = int(DB_THREADS)
+    if DB_MEMORY_LIMIT:
+        config['memory_limit'] = DB_MEMORY_LIMIT
+    # Snapshots keep the lake view paths of minilake.duckdb, relative to its directory
+    return set_file_search_path(duckdb.connect(path, read_only=read_only, config=config), DB_PATH)
+
+
+def _close():
+    global _connection, _path, _version
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+        _path = None
+        _version = None
+
+
+def _close_if_idle():
+    global _idle_timer
+    with _lock:
+        _idle_timer = None
+        if _connection is None or _in_use:
+            return
+        remaining = _last_used + IDLE_SECONDS - time.monotonic()
+        if remaining > 0:
+            _schedule_idle_close(remaining)
+            return
+        _close()
+        logger.debug('Closed idle dashboard connection.')
+
+
+def _schedule_idle_close(delay=IDLE_SECONDS):
+    global _idle_timer
+    if _idle_timer is None:
+        _idle_timer = threading.Timer(delay, _close_if_idle)
+        _idle_timer.daemon = True
+        _idle_timer.start()
+
+
+@contextmanager
+def cursor():
+    """Cursor on the shared read-only connection, for one session's queries.
+
+    The connection is opened on first use and reopened when the data version
+    changed since (a new snapshot was published or new data was committed);
+    the reopen waits for cursors still reading the previous version to be
+    returned. Before the first publish, when readers open minilake.duckdb
+    itself, they wait for dashboard writes to finish. Inside `reading`,
+    cursors come from the thread's private connection instead.
+    """
+    global _connection, _path, _version, _in_use, _last_used
+    private = getattr(_local, 'connection', None)
+    if private is not None:
+        cur = set_file_search_path(private.cursor(), DB_PATH)
+        try:
+            yield cur
+        finally:
+            cur.close()
+        return
+    with _lock:
+        path, version = _served_target()
+        if path == DB_PATH and _writing:
+            _lock.wait_for(lambda: _writing == 0)
+            path, version = _served_target()
+        if _connection is not None and version != _version:
+            _lock.wait_for(lambda: _in_use == 0)
+            _close()
+        if _connection is None:
+            _connection = _open(path, read_only=True)
+            _path = path
+            _version = version
+        _in_use += 1
+        cur = set_file_search_path(_connection.cursor(), DB_PATH)
+    try:
+        yield cur
+    finally:
+        cur.close()
+        with _lock:
+            _in_use -= 1
+            _last_used = time.monotonic()
+            _lock.notify_all()
+            _schedule_idle_close()
+
+
+@contextmanager
+def reading(snapshot):
+    """Run this thread's `cursor()` queries on a private read-only connection on `snapshot`.
+
+    The shared connection keeps reading the served version meanwhile.
+    """
+    con = _open(snapshot[0], read_only=True)
+    _local.connection = con
+    try:
+        yield
+    finally:
+        _local.connection = None
+        con.close()
+
+
+def is_write_locked(error):
+    """True when `error` is DuckDB refusing the write lock another process, e.g. the ingestion, holds."""
+    return isinstance(error, duckdb.IOException) and 'lock' in str(error).lower()
+
+
+@contextmanager
+def writer():
+    """Short-lived read-write connection for changes made from the dashboard.
+
+    A process cannot hold minilake.duckdb both read-only and read-write, so a
+    shared connection open on it (before the first publish) is closed first,
+    and readers wait to reopen it until the write is done. Readers of a
+    published snapshot keep going meanwhile. The changes are published as a
+    new snapshot when the block succeeds, and served at once.
+    """
+    global _writing
+    with _write_lock:
+        with _lock:
+            if _path == DB_PATH:
+                _lock.wait_for(lambda: _in_use == 0)
+                _close()
+            _writing += 1
+        try:
+            con = _open(DB_PATH, read_only=False)
+            try:
+                yield con
+                path = publish(con, DB_PATH, PUBLISHED_DIR)
+            finally:
+                con.close()
+            with _lock:
+                if _served is not None or _pinned:
+                    _serve((path, os.path.basename(path)))
+        finally:
+            with _lock:
+                _writing -= 1
+                _lock.notify_all()
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Most points sent to the browser per chart series, whatever the table size
+CHART_MAX_POINTS = int(os.environ.get('MINILAKE_CHART_POINTS', 1000))
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    `x` must be numeric and sorted. The first and last points are always kept;
+    in between, each bucket keeps the point forming the largest triangle with
+    the previously kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        keep[i + 1] = a
+    return keep
+
+
+def _numeric(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('int64').to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return np.arange(len(values), dtype=float)
+
+
+def downsample(con, query, x, y_columns, params=None, max_points=CHART_MAX_POINTS):
+    """Time series of `query` with at most `max_points` points per column of `y_columns`.
+
+    Returns a long DataFrame (series, x, y) ordered by series and x. DuckDB
+    first reduces every series to the first, last, lowest and highest point
+    of `max_points` equal-count buckets (M4), which keeps the shape of the
+    line at any size; LTTB then picks `max_points` of those in pandas. Series
+    shorter than `max_points` come back unchanged.
+    """
+    values = ', '.join(f'"{column}"' for column in y_columns)
+    reduced = f"""
+    WITH points AS (SELECT "{x}" AS x, {values} FROM ({query})),
+    long AS (UNPIVOT points ON {values} INTO NAME series VALUE y),
+    buckets AS (
+        SELECT series, x, y, ntile({int(max_points)}) OVER (PARTITION BY series ORDER BY x) AS bucket
+        FROM long
+    ),
+    extremes AS (
+        SELECT unnest([
+            {{'x': MIN(x), 'y': arg_min(y, x)}},
+            {{'x': MAX(x), 'y': arg_max(y, x)}},
+            {{'x': arg_min(x, y), 'y': MIN(y)}},
+            {{'x': arg_max(x, y), 'y': MAX(y)}}
+        ]) AS point, series
+        FROM buckets
+        GROUP BY series, bucket
+    )
+    SELECT DISTINCT series, point.x AS x, point.y AS y
+    FROM extremes
+    ORDER BY series, x
+    """
+    df = con.execute(reduced, params).fetchdf() if params else con.execute(reduced).fetchdf()
+    parts = []
+    for series, part in df.groupby('series', sort=False):
+        keep = lttb(_numeric(part['x']), part['y'].to_numpy(dtype=float), max_points)
+        parts.append(part.iloc[keep])
+    if not parts:
+        return df
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,147 @@
+import os
+import threading
+
+import duckdb
+import pandas as pd
+
+from src.ingestion.merge import table_types
+
+# The table explorer fetches one page per query; nothing is loaded whole.
+EXPLORER_PAGE_SIZES = [25, 50, 100, 500]
+# Exact counts that take longer than this are replaced by a sampled estimate
+COUNT_SECONDS = float(os.environ.get('MINILAKE_EXPLORER_COUNT_SECONDS', 1.0))
+COUNT_SAMPLE_PERCENT = 1
+
+# Filter operators: SQL template for a quoted column and a typed parameter
+FILTER_OPERATORS = {
+    '=': '{column} = {value}',
+    '!=': '{column} != {value}',
+    '<': '{column} < {value}',
+    '<=': '{column} <= {value}',
+    '>': '{column} > {value}',
+    '>=': '{column} >= {value}',
+    'contains': 'contains(lower(CAST({column} AS VARCHAR)), lower(?))',
+    'is null': '{column} IS NULL',
+    'is not null': '{column} IS NOT NULL',
+}
+
+
+def base_tables(con):
+    """Tables the explorer can page through (views have no rowid to page on)."""
+    rows = con.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """).fetchall()
+    return [row[0] for row in rows]
+
+
+def explorer_columns(con, table_name):
+    """Column name to DuckDB type of `table_name`."""
+    return table_types(con, table_name)
+
+
+def _check_column(column, types):
+    if column not in types:
+        raise ValueError(f"Unknown column '{column}'")
+    return f'"{column}"'
+
+
+def _typed_value(column, types):
+    return f'CAST(? AS {types[column]})'
+
+
+def build_filters(filters, types):
+    """WHERE clause and parameters for `filters`, a tuple of (column, operator, value).
+
+    Values are passed as parameters cast to the column type; columns and
+    operators are checked against `types` and FILTER_OPERATORS.
+    """
+    clauses, params = [], []
+    for column, operator, value in filters:
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator '{operator}'")
+        template = FILTER_OPERATORS[operator]
+        clauses.append(template.format(column=_check_column(column, types), value=_typed_value(column, types)))
+        if '?' in template or '{value}' in template:
+            params.append(value)
+    return ' AND '.join(clauses) or 'TRUE', params
+
+
+def _after_cursor(sort_column, descending, cursor, types):
+    """Keyset predicate for the rows after `cursor`, the (sort key, rowid) of the last row shown.
+
+    Rows are ordered by the sort column with NULLs last, then by rowid.
+    """
+    if cursor is None:
+        return 'TRUE', []
+    key, rowid = cursor
+    if sort_column is None:
+        return 'rowid > ?', [rowid]
+    column = _check_column(sort_column, types)
+    if key is None:
+        return f'({column} IS NULL AND rowid > ?)', [rowid]
+    value = _typed_value(sort_column, types)
+    comparison = '<' if descending else '>'
+    return (
+        f'({column} {comparison} {value} OR ({column} = {value} AND rowid > ?) OR {column} IS NULL)',
+        [key, key, rowid],
+    )
+
+
+def explorer_page(con, table_name, columns, filters=(), sort_column=None, descending=False,
+                  cursor=None, page_size=EXPLORER_PAGE_SIZES[0]):
+    """One page of `table_name` and the cursor of the next page (None on the last page).
+
+    Selection, filters, ordering and the keyset condition all run in DuckDB,
+    which only returns `page_size` rows. `cursor` is the value returned for
+    the previous page.
+    """
+    types = explorer_columns(con, table_name)
+    select = ', '.join(_check_column(column, types) for column in columns or types)
+    where, params = build_filters(filters, types)
+    after, after_params = _after_cursor(sort_column, descending, cursor, types)
+    if sort_column is None:
+        sort_key, order = 'NULL', 'rowid'
+    else:
+        sort = _check_column(sort_column, types)
+        sort_key = f'CAST({sort} AS VARCHAR)'
+        order = f"{sort} {'DESC' if descending else 'ASC'} NULLS LAST, rowid"
+    query = f"""
+    SELECT {select}, {sort_key} AS __sort_key, rowid AS __rowid
+    FROM "{table_name}"
+    WHERE ({where}) AND {after}
+    ORDER BY {order}
+    LIMIT {int(page_size) + 1}
+    """
+    page = con.execute(query, params + after_params).fetchdf()
+    next_cursor = None
+    if len(page) > page_size:
+        page = page.iloc[:page_size]
+        last = page.iloc[-1]
+        key = last['__sort_key']
+        next_cursor = (None if pd.isna(key) else str(key), int(last['__rowid']))
+    return page.drop(columns=['__sort_key', '__rowid']), next_cursor
+
+
+def explorer_count(con, table_name, filters=(), seconds=COUNT_SECONDS):
+    """Number of rows matching `filters` and whether it is exact.
+
+    The exact count is interrupted after `seconds`; the count over a
+    COUNT_SAMPLE_PERCENT system sample, scaled up, is returned instead.
+    """
+    types = explorer_columns(con, table_name)
+    where, params = build_filters(filters, types)
+    timer = threading.Timer(seconds, con.interrupt)
+    timer.start()
+    try:
+        return con.execute(f'SELECT COUNT(*) FROM "{table_name}" WHERE {where}', params).fetchone()[0], True
+    except duckdb.InterruptException:
+        pass
+    finally:
+        timer.cancel()
+    sampled = con.execute(f"""
+        SELECT COUNT(*) FROM (SELECT * FROM "{table_name}" USING SAMPLE {COUNT_SAMPLE_PERCENT} PERCENT (system))
+        WHERE {where}
+    """, params).fetchone()[0]
+    return int(sampled * 100 / COUNT_SAMPLE_PERCENT), False
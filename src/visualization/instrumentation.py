@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+# Timings of the last METRICS_BUFFER_SIZE queries, chart builds and page runs,
+# shared by all sessions of the process. With MINILAKE_METRICS_DB set they are
+# also appended to METRICS_TABLE in that DuckDB file (not the lake database,
+# which the dashboard only opens read-only).
+METRICS_BUFFER_SIZE = int(os.environ.get('MINILAKE_METRICS_BUFFER', 2000))
+METRICS_DB = os.environ.get('MINILAKE_METRICS_DB')
+METRICS_TABLE = 'dashboard_metrics'
+METRICS_COLUMNS = ['recorded_at', 'page', 'kind', 'name', 'seconds', 'rows', 'bytes', 'cached', 'sql', 'params']
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=METRICS_BUFFER_SIZE)
+_pending = []
+_metrics_con = None
+# Page and query being run by the current script thread (one per session)
+_local = threading.local()
+
+
+def record(kind, name, seconds, rows=None, nbytes=None, cached=None, sql=None, params=None):
+    """Add one timing to the buffer, tagged with the page being rendered."""
+    entry = {
+        'recorded_at': datetime.now(), 'page': getattr(_local, 'page', None), 'kind': kind, 'name': name,
+        'seconds': seconds, 'rows': rows, 'bytes': nbytes, 'cached': cached, 'sql': sql, 'params': params,
+    }
+    with _lock:
+        _buffer.append(entry)
+        if METRICS_DB:
+            _pending.append(entry)
+
+
+def _result_size(result):
+    """Rows and approximate bytes of a fetched result."""
+    # pandas is only imported by the pages that fetch DataFrames, not at startup
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(result, pd.DataFrame):
+        return len(result), int(result.memory_usage(deep=True).sum())
+    if result is None:
+        return 0, 0
+    rows = result if isinstance(result, list) else [result]
+    return len(rows), sum(sys.getsizeof(value) for row in rows for value in row)
+
+
+class InstrumentedConnection:
+    """DuckDB connection or cursor recording every query once its result is fetched.
+
+    The recorded time covers execution and the transfer into Python, which is
+    where a DataFrame result spends most of it.
+    """
+
+    def __init__(self, con):
+        self._con = con
+        self._query = None
+
+    def execute(self, query, parameters=None):
+        start = time.perf_counter()
+        if parameters is None:
+            self._con.execute(query)
+        else:
+            self._con.execute(query, parameters)
+        self._query = (query, parameters, start)
+        return self
+
+    def _fetch(self, method):
+        result = getattr(self._con, method)()
+        query, parameters, start = self._query
+        rows, nbytes = _result_size(result)
+        record(
+            'query', getattr(_local, 'query', None), time.perf_counter() - start, rows, nbytes,
+            sql=' '.join(query.split()), params=list(parameters) if parameters is not None else None,
+        )
+        return result
+
+    def fetchdf(self):
+        return self._fetch('fetchdf')
+
+    def fetchall(self):
+        return self._fetch('fetchall')
+
+    def fetchone(self):
+        return self._fetch('fetchone')
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+
+@contextmanager
+def timed(kind, name, **fields):
+    """Record how long the block takes, e.g. `with timed('chart', title):`.
+
+    Yields the dict of extra `record` fields, which the block may fill in.
+    """
+    fields = dict(fields)
+    start = time.perf_counter()
+    yield fields
+    record(kind, name, time.perf_counter() - start, **fields)
+
+
+@contextmanager
+def query_context(name):
+    """Name the queries run in the block after the dashboard query function."""
+    previous = getattr(_local, 'query', None)
+    _local.query = name
+    try:
+        yield
+    finally:
+        _local.query = previous
+
+
+def start_page(page):
+    """Tag the timings of this script run with `page`; returns the start time."""
+    _local.page = page
+    return time.perf_counter()
+
+
+def finish_page(page, start):
+    record('page', page, time.perf_counter() - start)
+    flush()
+
+
+def _metrics_connection():
+    global _metrics_con
+    if _metrics_con is None:
+        con = duckdb.connect(METRICS_DB)
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+                recorded_at TIMESTAMP,
+                page VARCHAR,
+                kind VARCHAR,
+                name VARCHAR,
+                seconds DOUBLE,
+                rows BIGINT,
+                bytes BIGINT,
+                cached BOOLEAN,
+                sql VARCHAR,
+                params VARCHAR
+            )
+        """)
+        _metrics_con = con
+    return _metrics_con
+
+
+def flush():
+    """Append the timings recorded since the last flush to METRICS_TABLE, if persisted."""
+    global _pending
+    if not METRICS_DB:
+        return
+    with _lock:
+        pending, _pending = _pending, []
+        if not pending:
+            return
+        rows = [
+            [entry[column] for column in METRICS_COLUMNS[:-1]]
+            + [json.dumps(entry['params'], default=str) if entry['params'] is not None else None]
+            for entry in pending
+        ]
+        try:
+            _metrics_connection().executemany(
+                f"INSERT INTO {METRICS_TABLE} VALUES ({', '.join('?' * len(METRICS_COLUMNS))})", rows
+            )
+        except duckdb.Error as e:
+            logger.warning(f'Could not persist {len(rows)} dashboard timings: {e}')
+
+
+def recent_metrics():
+    """The buffered timings as a DataFrame, oldest first."""
+    import pandas as pd
+    with _lock:
+        entries = list(_buffer)
+    return pd.DataFrame(entries, columns=METRICS_COLUMNS)
+
+
+def persisted_metrics():
+    """Every persisted timing as a DataFrame, or None when persistence is off."""
+    import pandas as pd
+    if not METRICS_DB:
+        return None
+    flush()
+    with _lock:
+        df = _metrics_connection().execute(f"SELECT * FROM {METRICS_TABLE} ORDER BY recorded_at").fetchdf()
+    df['params'] = df['params'].map(lambda value: json.loads(value) if pd.notna(value) else None)
+    return df
+
+
+def page_latencies(metrics):
+    """Latency percentiles of the page runs in `metrics`, in milliseconds."""
+    import pandas as pd
+    runs = metrics[metrics['kind'] == 'page']
+    if runs.empty:
+        return pd.DataFrame(columns=['page', 'runs', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+    grouped = runs.groupby('page')['seconds']
+    latencies = pd.DataFrame({
+        'runs': grouped.count(),
+        'p50_ms': grouped.quantile(0.5) * 1000,
+        'p90_ms': grouped.quantile(0.9) * 1000,
+        'p99_ms': grouped.quantile(0.99) * 1000,
+        'max_ms': grouped.max() * 1000,
+    })
+    return latencies.reset_index().sort_values('p90_ms', ascending=False)
+
+
+def time_breakdown(metrics):
+    """Seconds spent per page in queries, cached calls and chart builds."""
+    import pandas as pd
+    parts = metrics[metrics['kind'] != 'page']
+    if parts.empty:
+        return pd.DataFrame()
+    return parts.pivot_table(index='page', columns='kind', values='seconds', aggfunc='sum', fill_value=0.0)
+
+
+def slowest_queries(metrics, limit=20):
+    """The `limit` slowest query executions in `metrics`."""
+    queries = metrics[metrics['kind'] == 'query']
+    return queries.sort_values('seconds', ascending=False).head(limit).reset_index(drop=True)
+
+
+def explain_analyze(con, sql, params=None):
+    """Run `sql` under EXPLAIN ANALYZE and return the profiled plan as text."""
+    statement = f"EXPLAIN ANALYZE {sql}"
+    rows = con.execute(statement, params).fetchall() if params else con.execute(statement).fetchall()
+    return '\n'.join(row[-1] for row in rows)
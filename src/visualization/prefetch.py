@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+import threading
+
+from src.visualization.cache import cached
+from src.visualization.connection import latest_snapshot, pin, reading, serve
+from src.visualization.instrumentation import finish_page, start_page
+
+logger = logging.getLogger(__name__)
+
+# Every load ends by publishing a new snapshot (see src/ingestion/publish.py).
+# A background thread per Streamlit process looks for one every
+# PREFETCH_SECONDS, runs the queries of the YouTube and COVID-19 pages for
+# every country on it, and only then serves it: until the cache is warm,
+# sessions keep getting the previous snapshot's results, or minilake.duckdb's
+# before the first one is served. 0 disables it, and every new snapshot is
+# then served as soon as it is published. The queries (and pandas with them)
+# are imported by the thread, not by app.py at startup.
+PREFETCH_SECONDS = float(os.environ.get('MINILAKE_PREFETCH_SECONDS', 10))
+# Page name of the prefetch timings on the Performance page
+PREFETCH_PAGE = 'Prefetch'
+
+_lock = threading.Lock()
+_thread = None
+_warmed = None
+
+
+def warm_youtube(version):
+    """Run the YouTube Analysis queries of every country, with the arguments the page uses."""
+    from src.visualization.queries import (
+        youtube_countries, youtube_key_metrics, youtube_category_breakdown, youtube_top_channels,
+        youtube_monthly_trend, youtube_top_videos, youtube_engagement_quantiles, youtube_engagement_outliers,
+        youtube_engagement_histogram,
+    )
+    for country in cached(youtube_countries, version):
+        cached(youtube_key_metrics, version, country)
+        cached(youtube_category_breakdown, version, country)
+        cached(youtube_top_channels, version, country, limit=5)
+        cached(youtube_monthly_trend, version, country)
+        cached(youtube_top_videos, version, country, 'views', limit=10)
+        cached(youtube_top_videos, version, country, 'engagement_rate', limit=10)
+        cached(youtube_engagement_quantiles, version, country)
+        cached(youtube_engagement_outliers, version, country)
+        cached(youtube_engagement_histogram, version, country)
+
+
+def warm_corona(version):
+    """Run the COVID-19 Analysis queries, with the drill-down of every country over
+    the default date range and the county lists of every US state."""
+    from src.visualization.queries import (
+        corona_global_stats, corona_daily_trends, corona_top_countries, corona_outcome_rates,
+        corona_countries, corona_states, corona_counties, corona_date_range, corona_country_series,
+    )
+    cached(corona_global_stats, version)
+    cached(corona_daily_trends, version)
+    cached(corona_top_countries, version, limit=20)
+    cached(corona_outcome_rates, version, limit=20)
+    countries = cached(corona_countries, version)
+    if countries:
+        first, last = cached(corona_date_range, version, 'full_grouped')
+        for country in countries:
+            cached(corona_country_series, version, country, first, last)
+    states = cached(corona_states, version)
+    if states:
+        cached(corona_date_range, version, 'usa_county_wise')
+        for state in states:
+            cached(corona_counties, version, state)
+
+
+def warm(snapshot):
+    """Cache the page queries of `snapshot` (a `connection.latest_snapshot()` value), then serve it."""
+    start = start_page(PREFETCH_PAGE)
+    with reading(snapshot):
+        warm_youtube(snapshot[1])
+        warm_corona(snapshot[1])
+    serve(snapshot)
+    finish_page(PREFETCH_PAGE, start)
+    logger.info(f'Prefetched the page queries of {snapshot[1]} in {time.perf_counter() - start:.1f}s.')
+
+
+def _run():
+    global _warmed
+    while True:
+        snapshot = latest_snapshot()
+        if snapshot is not None and snapshot != _warmed:
+            try:
+                warm(snapshot)
+            except Exception:
+                # Serve it anyway rather than the previous data forever
+                logger.exception(f'Could not prefetch {snapshot[1]}; serving it uncached.')
+                serve(snapshot)
+            _warmed = snapshot
+        time.sleep(PREFETCH_SECONDS)
+
+
+def start_prefetcher():
+    """Start the prefetch thread of this process, once (see PREFETCH_SECONDS)."""
+    global _thread
+    if PREFETCH_SECONDS <= 0:
+        return
+    with _lock:
+        if _thread is None:
+            # Sessions stay on what they read now until a snapshot is warmed
+            pin()
+            _thread = threading.Thread(target=_run, name='minilake-prefetch', daemon=True)
+            _thread.start()
@@ -0,0 +1,252 @@
+# Queries behind the dashboard charts. Each function returns only the rows a
+# chart or metric needs; aggregates are read from the summary tables kept up to
+# date by the ingestion (see src/ingestion/summaries.py). Long series are
+# downsampled in DuckDB (see downsampling.py), so chart payloads stay bounded.
+
+from src.ingestion.catalog import COLUMN_STATS_TABLE, STATS_TABLE
+from src.ingestion.merge import table_exists
+from src.visualization.downsampling import CHART_MAX_POINTS, downsample
+
+
+def youtube_countries(con):
+    rows = con.execute("SELECT country FROM summary_youtube_metrics ORDER BY country").fetchall()
+    return [row[0] for row in rows]
+
+
+def youtube_key_metrics(con, country):
+    """Total videos, total views, most frequent category and average engagement (%)."""
+    return con.execute(
+        "SELECT total_videos, total_views, most_popular_category, avg_engagement "
+        "FROM summary_youtube_metrics WHERE country = ?",
+        [country],
+    ).fetchdf().iloc[0]
+
+
+def youtube_category_breakdown(con, country):
+    query = """
+    SELECT category_name, video_count, avg_views, avg_likes, avg_comments
+    FROM summary_youtube_categories
+    WHERE country = ?
+    ORDER BY video_count DESC
+    """
+    return con.execute(query, [country]).fetchdf()
+
+
+def youtube_top_channels(con, country, limit=5):
+    query = """
+    SELECT channel_title, total_views, video_count
+    FROM summary_youtube_channels
+    WHERE country = ? AND rank <= ?
+    ORDER BY rank
+    """
+    return con.execute(query, [country, limit]).fetchdf()
+
+
+def youtube_monthly_trend(con, country):
+    """Number of trending videos per publication month ('YYYY-MM')."""
+    query = """
+    SELECT month, video_count
+    FROM summary_youtube_monthly
+    WHERE country = ?
+    ORDER BY month
+    """
+    return con.execute(query, [country]).fetchdf()
+
+
+def youtube_top_videos(con, country, order_column, limit=10):
+    """Top videos by `views` or `engagement_rate`."""
+    if order_column not in ('views', 'engagement_rate'):
+        raise ValueError(f"Cannot rank videos by '{order_column}'")
+    query = """
+    SELECT title, views, engagement_rate
+    FROM summary_youtube_top_videos
+    WHERE country = ? AND ranking = ? AND rank <= ?
+    ORDER BY rank
+    """
+    return con.execute(query, [country, order_column, limit]).fetchdf()
+
+
+def youtube_engagement_quantiles(con, country):
+    """Box-plot statistics of the engagement rate: quartiles, 1.5 IQR fences and outlier count."""
+    query = """
+    SELECT q1, median, q3, lower_fence, upper_fence, outlier_count
+    FROM summary_youtube_engagement
+    WHERE country = ?
+    """
+    return con.execute(query, [country]).fetchdf()
+
+
+def youtube_engagement_outliers(con, country):
+    """A capped sample of the videos outside the fences, always including the extremes."""
+    query = """
+    SELECT title, engagement_rate
+    FROM summary_youtube_engagement_outliers
+    WHERE country = ?
+    ORDER BY engagement_rate
+    """
+    return con.execute(query, [country]).fetchdf()
+
+
+def youtube_engagement_histogram(con, country):
+    """Engagement rate histogram between the fences, in fixed-width bins."""
+    query = """
+    SELECT bin_start, bin_end, video_count
+    FROM summary_youtube_engagement_histogram
+    WHERE country = ?
+    ORDER BY bin
+    """
+    return con.execute(query, [country]).fetchdf()
+
+
+def list_tables(con):
+    """Names of the tables, without the views such as the `lake_*` ones."""
+    rows = con.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """).fetchall()
+    return [row[0] for row in rows]
+
+
+def table_catalog(con):
+    """Row count, size and statistics age of every table, read from the catalog.
+
+    Tables the ingestion has not described yet fall back to DuckDB's own row
+    count estimate, without scanning them.
+    """
+    if not table_exists(con, STATS_TABLE):
+        return con.execute("""
+        SELECT table_name, estimated_size AS row_count, column_count,
+            NULL AS storage_bytes, NULL AS lake_bytes, NULL AS exact, NULL AS computed_at
+        FROM duckdb_tables()
+        WHERE schema_name = 'main'
+        ORDER BY table_name
+        """).fetchdf()
+    query = f"""
+    SELECT
+        t.table_name,
+        COALESCE(s.row_count, t.estimated_size) AS row_count,
+        t.column_count,
+        s.storage_bytes,
+        s.lake_bytes,
+        s.exact,
+        s.computed_at
+    FROM duckdb_tables() t
+    LEFT JOIN {STATS_TABLE} s USING (table_name)
+    WHERE t.schema_name = 'main' AND t.table_name NOT IN ('{STATS_TABLE}', '{COLUMN_STATS_TABLE}')
+    ORDER BY t.table_name
+    """
+    return con.execute(query).fetchdf()
+
+
+def column_catalog(con, table_name):
+    """Per-column type, null count, distinct count and min/max of `table_name`."""
+    if not table_exists(con, COLUMN_STATS_TABLE):
+        return None
+    query = f"""
+    SELECT column_name, column_type, null_count, distinct_count, min_value, max_value
+    FROM {COLUMN_STATS_TABLE}
+    WHERE table_name = ?
+    ORDER BY ordinal
+    """
+    columns = con.execute(query, [table_name]).fetchdf()
+    return columns if len(columns) else None
+
+
+def table_sample(con, table_name, limit=5):
+    return con.execute(f'SELECT * FROM "{table_name}" LIMIT {int(limit)}').fetchdf()
+
+
+def corona_global_stats(con):
+    return con.execute(
+        "SELECT total_cases, total_deaths, total_recovered, active_cases FROM summary_corona_global"
+    ).fetchdf()
+
+
+def corona_daily_trends(con, max_points=CHART_MAX_POINTS):
+    """New cases, deaths and recoveries per day as (series, x, y) rows, downsampled."""
+    query = "SELECT date, new_cases, new_deaths, new_recovered FROM summary_corona_daily"
+    return downsample(con, query, 'date', ['new_cases', 'new_deaths', 'new_recovered'], max_points=max_points)
+
+
+def corona_top_countries(con, limit=20):
+    query = """
+    SELECT
+        country_region, total_cases, total_deaths, total_recovered, active_cases,
+        population, cases_per_population
+    FROM summary_corona_countries
+    WHERE country_region != 'World'
+    ORDER BY total_cases DESC
+    LIMIT ?
+    """
+    return con.execute(query, [limit]).fetchdf()
+
+
+def corona_outcome_rates(con, limit=20):
+    """Recovery and death rates (%) of the countries with the most cases."""
+    query = """
+    SELECT country_region, recovery_rate, death_rate
+    FROM summary_corona_countries
+    WHERE total_cases > 1000
+    ORDER BY total_cases DESC
+    LIMIT ?
+    """
+    return con.execute(query, [limit]).fetchdf()
+
+
+# Drill-down into one country or one US county. full_grouped and
+# usa_county_wise are stored ordered by region then date (see
+# src/ingestion/schema.py), so the equality filters below skip every row group
+# of the other regions.
+CORONA_COUNTRY_SERIES = ['Confirmed', 'Deaths', 'Recovered', 'Active', 'New cases', 'New deaths']
+CORONA_COUNTY_SERIES = ['Confirmed', 'Deaths']
+
+
+def corona_countries(con):
+    rows = con.execute('SELECT DISTINCT "Country/Region" FROM full_grouped ORDER BY 1').fetchall()
+    return [row[0] for row in rows]
+
+
+def corona_states(con):
+    rows = con.execute('SELECT DISTINCT "Province_State" FROM usa_county_wise ORDER BY 1').fetchall()
+    return [row[0] for row in rows]
+
+
+def corona_counties(con, state):
+    query = """
+    SELECT DISTINCT "Admin2"
+    FROM usa_county_wise
+    WHERE "Province_State" = ? AND "Admin2" IS NOT NULL
+    ORDER BY 1
+    """
+    rows = con.execute(query, [state]).fetchall()
+    return [row[0] for row in rows]
+
+
+def corona_date_range(con, table_name):
+    """First and last `Date` of `table_name`, for the drill-down date picker."""
+    if table_name not in ('full_grouped', 'usa_county_wise'):
+        raise ValueError(f"No drill-down on '{table_name}'")
+    return con.execute(f'SELECT MIN("Date"), MAX("Date") FROM {table_name}').fetchone()
+
+
+def corona_country_series(con, country, start, end, max_points=CHART_MAX_POINTS):
+    """Daily counts of one country between `start` and `end` as (series, x, y) rows, downsampled."""
+    columns = ', '.join(f'"{column}"' for column in CORONA_COUNTRY_SERIES)
+    query = f"""
+    SELECT "Date", {columns}
+    FROM full_grouped
+    WHERE "Country/Region" = ? AND "Date" BETWEEN ? AND ?
+    """
+    return downsample(con, query, 'Date', CORONA_COUNTRY_SERIES, [country, start, end], max_points)
+
+
+def corona_county_series(con, state, county, start, end, max_points=CHART_MAX_POINTS):
+    """Cumulative counts of one US county between `start` and `end` as (series, x, y) rows, downsampled."""
+    columns = ', '.join(f'"{column}"' for column in CORONA_COUNTY_SERIES)
+    query = f"""
+    SELECT "Date", {columns}
+    FROM usa_county_wise
+    WHERE "Province_State" = ? AND "Admin2" = ? AND "Date" BETWEEN ? AND ?
+    """
+    return downsample(con, query, 'Date', CORONA_COUNTY_SERIES, [state, county, start, end], max_points)
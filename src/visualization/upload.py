@@ -0,0 +1,110 @@
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from src.ingestion.catalog import refresh_table_statistics
+from src.ingestion.csv_loader import load_csv
+from src.ingestion.merge import PRIMARY_KEYS, merge_table, table_columns, table_exists, table_types
+from src.ingestion.schema import table_conversions
+
+# Uploads are copied to disk in chunks and parsed by DuckDB's CSV reader, so a
+# large file is never held twice in memory or turned into a DataFrame.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_ENCODINGS = ('utf-8', 'latin1')
+PREVIEW_ROWS = 5
+PROGRESS_INTERVAL = 0.2
+TABLE_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def valid_table_name(table_name):
+    return bool(TABLE_NAME_PATTERN.match(table_name))
+
+
+def preview_upload(uploaded_file, rows=PREVIEW_ROWS):
+    """First `rows` rows of an uploaded CSV file; the rest of it is not parsed."""
+    last_error = None
+    for encoding in UPLOAD_ENCODINGS:
+        uploaded_file.seek(0)
+        try:
+            return pd.read_csv(uploaded_file, nrows=rows, encoding=encoding)
+        except UnicodeDecodeError as e:
+            last_error = e
+        finally:
+            uploaded_file.seek(0)
+    raise last_error
+
+
+def save_upload(uploaded_file, progress=None):
+    """Copy an uploaded file into a temporary CSV file chunk by chunk.
+
+    `progress(fraction)` is called after every chunk. Returns the file path,
+    which the caller removes.
+    """
+    total = uploaded_file.size or 1
+    fd, tmp_path = tempfile.mkstemp(suffix='.csv', prefix='minilake_upload_')
+    try:
+        uploaded_file.seek(0)
+        with os.fdopen(fd, 'wb') as dst:
+            copied = 0
+            for chunk in iter(lambda: uploaded_file.read(UPLOAD_CHUNK_SIZE), b''):
+                dst.write(chunk)
+                copied += len(chunk)
+                if progress:
+                    progress(min(copied / total, 1.0))
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def _run_with_progress(con, statement, progress):
+    """Run `statement()` on a worker thread while reporting DuckDB's query progress."""
+    if progress is None:
+        return statement()
+    con.execute("SET enable_progress_bar = true")
+    con.execute("SET enable_progress_bar_print = false")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(statement)
+        while not wait([future], timeout=PROGRESS_INTERVAL).done:
+            percent = con.query_progress()
+            if percent >= 0:
+                progress(min(percent / 100, 1.0))
+    return future.result()
+
+
+def load_upload(con, fpath, table_name, append=False, key_columns=None, progress=None):
+    """Load a saved upload into `table_name` through the writer `con`.
+
+    The file is parsed into a TEMP table first. Without `append` the table is
+    then replaced in one statement, so a failed load leaves the previous table
+    in place. With `append` the rows are merged like ingested files
+    (`merge.merge_table`): new keys are inserted, changed rows replace their
+    key and identical rows are skipped. Keys are `key_columns`, else the
+    table's declared primary key, else all columns. Returns the merge stats.
+    """
+    temp_table = f"{table_name}_upload"
+    existing = table_exists(con, table_name)
+    types = table_types(con, table_name) if append and existing else None
+    try:
+        rows = _run_with_progress(
+            con,
+            lambda: load_csv(con, fpath, temp_table, encodings=UPLOAD_ENCODINGS, types=types, temporary=True,
+                             conversions=table_conversions(table_name)),
+            progress,
+        )
+    except Exception:
+        con.execute(f"DROP TABLE IF EXISTS {temp_table}")
+        raise
+
+    if append and existing:
+        key_columns = key_columns or PRIMARY_KEYS.get(table_name) or table_columns(con, table_name)
+        stats = merge_table(con, table_name, temp_table, key_columns=key_columns)
+    else:
+        con.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM {temp_table}")
+        con.execute(f"DROP TABLE {temp_table}")
+        stats = {'rows_in': rows, 'inserted': rows, 'updated': 0, 'duplicates': 0, 'unchanged': 0}
+    refresh_table_statistics(con, table_name)
+    return stats
@@ -0,0 +1,84 @@
+import os
+
+import streamlit as st
+
+from src.ingestion.catalog import drop_table_statistics
+from src.visualization.cache import cached, clear_cache
+from src.visualization.connection import is_write_locked, writer
+from src.visualization.queries import list_tables
+from src.visualization.upload import PREVIEW_ROWS, load_upload, preview_upload, save_upload, valid_table_name
+
+
+# Shown instead of the error when the ingestion holds the database write lock
+WRITE_LOCKED_MESSAGE = "The ingestion is writing to the database right now. Try again once it has finished."
+
+
+def render(version):
+    """CSV upload into a new or existing table, and table deletion."""
+    st.title("Control Panel")
+    st.write("Upload a CSV file to insert into DuckDB or delete an existing table.")
+
+    # --- Upload CSV and Insert into DuckDB ---
+    st.subheader("Upload CSV and Insert into DuckDB")
+    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+    if uploaded_file is not None:
+        preview = preview_upload(uploaded_file)
+        st.write(f"Preview of uploaded CSV (first {PREVIEW_ROWS} rows):")
+        st.dataframe(preview)
+        new_table_name = st.text_input("Enter a table name (e.g. my_new_table):")
+        append = st.checkbox("Append to the table if it exists (new and changed rows only)")
+        key_columns = []
+        if append:
+            key_columns = st.multiselect(
+                "Key columns (default: the table's primary key, else all columns)", list(preview.columns)
+            )
+        if new_table_name and not valid_table_name(new_table_name):
+            st.error("Table names may only contain letters, digits and underscores.")
+        elif new_table_name and st.button("Insert CSV into DuckDB"):
+            progress = st.progress(0.0, text="Saving upload...")
+            tmp_path = save_upload(uploaded_file, lambda f: progress.progress(f, text="Saving upload..."))
+            try:
+                with writer() as con:
+                    stats = load_upload(
+                        con, tmp_path, new_table_name, append=append, key_columns=key_columns,
+                        progress=lambda f: progress.progress(f, text="Loading into DuckDB..."),
+                    )
+                progress.progress(1.0, text="Done")
+                clear_cache()
+                st.success(
+                    f"CSV loaded into table {new_table_name}: {stats['inserted']:,} rows inserted, "
+                    f"{stats['updated']:,} updated, {stats['unchanged'] + stats['duplicates']:,} skipped."
+                )
+            except Exception as e:
+                if is_write_locked(e):
+                    st.warning(WRITE_LOCKED_MESSAGE)
+                else:
+                    st.error(f"Could not load the CSV into {new_table_name}: {e}")
+            finally:
+                os.remove(tmp_path)
+
+    # --- List and Delete Existing Tables ---
+    st.subheader("Existing Tables")
+    tables = cached(list_tables, version)
+    if not tables:
+        st.write("No tables found.")
+    else:
+        for table_name in tables:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"Table: {table_name}")
+            with col2:
+                if st.button(f"Delete {table_name}", key=f"del_{table_name}"):
+                    try:
+                        with writer() as con:
+                            con.execute(f'DROP TABLE "{table_name}";')
+                            drop_table_statistics(con, table_name)
+                    except Exception as e:
+                        if is_write_locked(e):
+                            st.warning(WRITE_LOCKED_MESSAGE)
+                        else:
+                            st.error(f"Could not delete table {table_name}: {e}")
+                    else:
+                        clear_cache()
+                        st.success(f"Table {table_name} deleted.")
+                        st.rerun()
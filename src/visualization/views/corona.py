@@ -0,0 +1,122 @@
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.visualization.cache import cached
+from src.visualization.instrumentation import timed
+from src.visualization.queries import (
+    corona_global_stats, corona_daily_trends, corona_top_countries, corona_outcome_rates,
+    corona_countries, corona_states, corona_counties, corona_date_range, corona_country_series,
+    corona_county_series,
+)
+
+
+def render(version):
+    """Global COVID-19 figures, country rankings and the country or county drill-down."""
+    st.title("COVID-19 Analysis")
+
+    # 1. Global Overview
+    st.subheader("Global Overview")
+    global_stats = cached(corona_global_stats, version)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Cases", f"{global_stats['total_cases'][0]:,.0f}")
+    with col2:
+        st.metric("Total Deaths", f"{global_stats['total_deaths'][0]:,.0f}")
+    with col3:
+        st.metric("Total Recovered", f"{global_stats['total_recovered'][0]:,.0f}")
+    with col4:
+        st.metric("Active Cases", f"{global_stats['active_cases'][0]:,.0f}")
+
+    # 2. Daily Trends
+    st.subheader("Daily Global Trends")
+    daily_df = cached(corona_daily_trends, version)
+
+    with timed('chart', 'Daily Global COVID-19 Trends'):
+        fig = go.Figure()
+        for series, name in [('new_cases', 'New Cases'), ('new_deaths', 'New Deaths'),
+                             ('new_recovered', 'New Recovered')]:
+            points = daily_df[daily_df['series'] == series]
+            fig.add_trace(go.Scatter(x=points['x'], y=points['y'], mode='lines', name=name))
+        fig.update_layout(
+            title='Daily Global COVID-19 Trends',
+            xaxis_title='Date',
+            yaxis_title='Count',
+            hovermode='x unified'
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    # 3. Country-wise Analysis
+    st.subheader("Country-wise Analysis")
+    country_df = cached(corona_top_countries, version, limit=20)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with timed('chart', 'Total Cases by Country (Top 20)'):
+            fig = px.bar(country_df, x='country_region', y='total_cases',
+                        title='Total Cases by Country (Top 20)',
+                        labels={'country_region': 'Country', 'total_cases': 'Total Cases'})
+            fig.update_layout(xaxis_tickangle=-45)
+            st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        with timed('chart', 'Cases per Population (%) (Top 20)'):
+            fig = px.bar(country_df, x='country_region', y='cases_per_population',
+                        title='Cases per Population (%) (Top 20)',
+                        labels={'country_region': 'Country', 'cases_per_population': 'Cases per Population (%)'})
+            fig.update_layout(xaxis_tickangle=-45)
+            st.plotly_chart(fig, use_container_width=True)
+
+    # 4. Recovery and Death Rates
+    st.subheader("Recovery and Death Rates")
+    rates_df = cached(corona_outcome_rates, version, limit=20)
+
+    with timed('chart', 'Recovery and Death Rates by Country (Top 20 by Cases)'):
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=rates_df['country_region'], y=rates_df['recovery_rate'],
+                            name='Recovery Rate'))
+        fig.add_trace(go.Bar(x=rates_df['country_region'], y=rates_df['death_rate'],
+                            name='Death Rate'))
+        fig.update_layout(
+            title='Recovery and Death Rates by Country (Top 20 by Cases)',
+            xaxis_title='Country',
+            yaxis_title='Rate (%)',
+            barmode='group',
+            xaxis_tickangle=-45
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    # 5. Drill-down into one country or one US county
+    st.subheader("Drill-down")
+    level = st.radio("Region", ["Country", "US county"], horizontal=True)
+    if level == "Country":
+        table_name = 'full_grouped'
+        countries = cached(corona_countries, version)
+        region = (st.selectbox("Country", countries),) if countries else None
+    else:
+        table_name = 'usa_county_wise'
+        col1, col2 = st.columns(2)
+        with col1:
+            state = st.selectbox("State", cached(corona_states, version))
+        with col2:
+            county = st.selectbox("County", cached(corona_counties, version, state) if state else [])
+        region = (state, county) if state and county else None
+
+    if region:
+        first, last = cached(corona_date_range, version, table_name)
+        dates = st.date_input("Date range", (first, last), min_value=first, max_value=last)
+        if len(dates) == 2:
+            start, end = dates
+            if level == "Country":
+                series_df = cached(corona_country_series, version, *region, start, end)
+            else:
+                series_df = cached(corona_county_series, version, *region, start, end)
+            title = f"COVID-19 in {', '.join(reversed(region))}"
+
+            with timed('chart', 'Drill-down'):
+                fig = go.Figure()
+                for series, points in series_df.groupby('series', sort=False):
+                    fig.add_trace(go.Scatter(x=points['x'], y=points['y'], mode='lines', name=series))
+                fig.update_layout(title=title, xaxis_title='Date', yaxis_title='Count', hovermode='x unified')
+                st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,52 @@
+import pandas as pd
+import streamlit as st
+
+from src.ingestion.catalog import refresh_statistics
+from src.visualization.cache import cached, clear_cache
+from src.visualization.connection import data_version, writer
+from src.visualization.queries import column_catalog, table_catalog, table_sample
+
+
+def render(version):
+    """Tables of the lake with their statistics and a sample of each."""
+    st.title("Data Lake Overview")
+
+    # Statistics are computed at ingestion time; an exact refresh rescans every table
+    if st.button("Refresh exact statistics"):
+        try:
+            with writer() as con:
+                refresh_statistics(con, exact=True)
+            clear_cache()
+            version = data_version()
+            st.success("Exact statistics computed for every table.")
+        except Exception as e:
+            st.error(f"Could not refresh statistics: {e}")
+
+    # List all tables
+    st.subheader("Available Tables")
+    catalog = cached(table_catalog, version)
+    for table in catalog.itertuples():
+        table_name = table.table_name
+        details = f"{table.row_count:,} rows"
+        if pd.notna(table.storage_bytes):
+            details += f", {table.storage_bytes / 1024 ** 2:,.1f} MiB in DuckDB"
+        if pd.notna(table.lake_bytes):
+            details += f", {table.lake_bytes / 1024 ** 2:,.1f} MiB in the lake"
+        if pd.notna(table.computed_at):
+            kind = "exact" if table.exact else "approximate distinct counts"
+            details += f" (statistics of {table.computed_at:%Y-%m-%d %H:%M}, {kind})"
+        st.write(f"- {table_name}: {details}")
+
+        # Show sample data; the content of a collapsed expander still runs, so
+        # the sample and column queries wait for the table to be picked
+        if st.checkbox(f"Sample data from {table_name}", key=f"sample_{table_name}"):
+            sample = cached(table_sample, version, table_name)
+            st.dataframe(sample)
+
+            # Show column info
+            st.write("Column Information:")
+            columns = cached(column_catalog, version, table_name)
+            if columns is None:
+                st.write("No statistics yet, they are computed by the next ingestion run.")
+            else:
+                st.dataframe(columns, hide_index=True)
@@ -0,0 +1,41 @@
+import streamlit as st
+
+from src.visualization.connection import cursor
+from src.visualization.instrumentation import (
+    METRICS_DB, explain_analyze, page_latencies, persisted_metrics, recent_metrics, slowest_queries,
+    time_breakdown,
+)
+
+
+def render(version):
+    """Timings recorded by instrumentation.py, with EXPLAIN ANALYZE of the slowest queries."""
+    st.title("Dashboard Performance")
+    st.write("Timings of the dashboard's queries, chart builds and page runs, across all sessions.")
+
+    metrics = recent_metrics()
+    if METRICS_DB:
+        source = st.radio("Timings", ["Recent (in memory)", "Persisted history"], horizontal=True)
+        if source == "Persisted history":
+            metrics = persisted_metrics()
+    if metrics.empty:
+        st.info("No timings recorded yet; open the other pages first.")
+    else:
+        st.subheader("Page Latency")
+        st.dataframe(page_latencies(metrics), hide_index=True)
+
+        st.subheader("Time Spent per Page (seconds)")
+        st.write("`call` is the time to get a possibly cached result, `query` the DuckDB work "
+                 "inside cache misses and `chart` building and sending a figure.")
+        st.dataframe(time_breakdown(metrics))
+
+        st.subheader("Slowest Queries")
+        slowest = slowest_queries(metrics)
+        st.dataframe(slowest[['recorded_at', 'page', 'name', 'seconds', 'rows', 'bytes', 'sql']], hide_index=True)
+
+        if not slowest.empty:
+            st.subheader("Query Plan")
+            plans = slowest.drop_duplicates('sql').set_index('sql')
+            sql = st.selectbox("Query", list(plans.index), format_func=lambda q: f"{plans['name'][q]}: {q[:100]}")
+            if st.button("Run EXPLAIN ANALYZE"):
+                with cursor() as con:
+                    st.code(explain_analyze(con, sql, plans['params'][sql]))
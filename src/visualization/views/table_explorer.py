@@ -0,0 +1,71 @@
+import pandas as pd
+import streamlit as st
+
+from src.visualization.cache import cached
+from src.visualization.explorer import (
+    EXPLORER_PAGE_SIZES, FILTER_OPERATORS, base_tables, explorer_columns, explorer_count, explorer_page,
+)
+
+
+def render(version):
+    """Paged, filtered and sorted view of any base table."""
+    st.title("Table Explorer")
+    st.write("Browse any table one page at a time; filters and sorting run in DuckDB.")
+
+    table_name = st.selectbox("Table", cached(base_tables, version))
+    if table_name:
+        types = cached(explorer_columns, version, table_name)
+        columns = st.multiselect("Columns (default: all)", list(types))
+        filter_rows = st.data_editor(
+            pd.DataFrame({'column': pd.Series(dtype=str), 'operator': pd.Series(dtype=str),
+                          'value': pd.Series(dtype=str)}),
+            num_rows="dynamic", key=f"filters_{table_name}", use_container_width=True,
+            column_config={
+                'column': st.column_config.SelectboxColumn("Column", options=list(types)),
+                'operator': st.column_config.SelectboxColumn("Operator", options=list(FILTER_OPERATORS)),
+                'value': st.column_config.TextColumn("Value"),
+            },
+        )
+        filters = tuple(
+            (row.column, row.operator, None if pd.isna(row.value) else row.value)
+            for row in filter_rows.itertuples()
+            if pd.notna(row.column) and pd.notna(row.operator)
+            and (row.operator in ('is null', 'is not null') or pd.notna(row.value))
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_column = st.selectbox("Sort by", [None] + list(types), format_func=lambda c: c or "(storage order)")
+        with col2:
+            descending = st.checkbox("Descending")
+        with col3:
+            page_size = st.selectbox("Rows per page", EXPLORER_PAGE_SIZES)
+
+        # Keyset pagination: the cursor of every page shown so far, reset when the query changes
+        query_key = (table_name, tuple(columns), filters, sort_column, descending, page_size)
+        if st.session_state.get('explorer_query') != query_key:
+            st.session_state['explorer_query'] = query_key
+            st.session_state['explorer_cursors'] = [None]
+        cursors = st.session_state['explorer_cursors']
+
+        try:
+            rows, exact = cached(explorer_count, version, table_name, filters)
+            rows_page, next_cursor = cached(
+                explorer_page, version, table_name, tuple(columns), filters, sort_column, descending,
+                cursors[-1], page_size,
+            )
+        except Exception as e:
+            st.error(f"Could not query {table_name}: {e}")
+        else:
+            st.write(f"{rows:,} matching rows" if exact else f"About {rows:,} matching rows (sampled estimate)")
+            first_row = (len(cursors) - 1) * page_size
+            st.dataframe(rows_page, hide_index=True)
+            st.caption(f"Rows {first_row + 1 if len(rows_page) else 0:,} to {first_row + len(rows_page):,}")
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Previous page", disabled=len(cursors) == 1):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                if st.button("Next page", disabled=next_cursor is None):
+                    cursors.append(next_cursor)
+                    st.rerun()
@@ -0,0 +1,130 @@
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.visualization.cache import cached
+from src.visualization.instrumentation import timed
+from src.visualization.queries import (
+    youtube_countries, youtube_key_metrics, youtube_category_breakdown, youtube_top_channels,
+    youtube_monthly_trend, youtube_top_videos, youtube_engagement_quantiles, youtube_engagement_outliers,
+    youtube_engagement_histogram,
+)
+
+
+def render(version):
+    """Trending video metrics of one country."""
+    st.title("YouTube Trends Analysis")
+
+    # Country selection
+    selected_country = st.selectbox("Select Country", cached(youtube_countries, version))
+
+    # --- Summary Metrics ---
+    st.markdown("#### Key Metrics")
+    metrics = cached(youtube_key_metrics, version, selected_country)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Videos", f"{metrics['total_videos']:,}")
+    with col2:
+        st.metric("Total Views", f"{metrics['total_views']:,.0f}")
+    with col3:
+        st.metric("Most Popular Category", metrics['most_popular_category'])
+    with col4:
+        st.metric("Avg. Engagement (%)", f"{metrics['avg_engagement']:.2f}")
+
+    # --- Video Categories Analysis ---
+    st.subheader("Video Categories Analysis")
+    st.write("Distribution of videos and average views by category.")
+    category_df = cached(youtube_category_breakdown, version, selected_country)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with timed('chart', 'Number of Videos by Category'):
+            fig = px.bar(category_df, x='category_name', y='video_count',
+                        title='Number of Videos by Category',
+                        labels={'category_name': 'Category', 'video_count': 'Number of Videos'},
+                        color='video_count', color_continuous_scale='Blues')
+            fig.update_layout(xaxis_tickangle=-45)
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        with timed('chart', 'Average Views by Category'):
+            fig = px.bar(category_df, x='category_name', y='avg_views',
+                        title='Average Views by Category',
+                        labels={'category_name': 'Category', 'avg_views': 'Average Views'},
+                        color='avg_views', color_continuous_scale='Greens')
+            fig.update_layout(xaxis_tickangle=-45)
+            st.plotly_chart(fig, use_container_width=True)
+
+    # --- Top Channels ---
+    st.subheader("Top Channels by Total Views")
+    st.write("Channels with the highest total views.")
+    top_channels = cached(youtube_top_channels, version, selected_country, limit=5)
+    with timed('chart', 'Top 5 Channels by Total Views'):
+        fig = px.bar(top_channels, x='total_views', y='channel_title', orientation='h',
+                    title='Top 5 Channels by Total Views',
+                    labels={'channel_title': 'Channel', 'total_views': 'Total Views'},
+                    color='total_views', color_continuous_scale='Oranges')
+        st.plotly_chart(fig, use_container_width=True)
+
+    # --- Trending Patterns Over Time ---
+    st.subheader("Trending Videos Over Time")
+    st.write("Number of trending videos published per month.")
+    trend_df = cached(youtube_monthly_trend, version, selected_country)
+    with timed('chart', 'Trending Videos Published Per Month'):
+        fig = px.line(trend_df, x='month', y='video_count',
+                    title='Trending Videos Published Per Month',
+                    labels={'month': 'Month', 'video_count': 'Number of Videos'})
+        st.plotly_chart(fig, use_container_width=True)
+
+    # --- Engagement Metrics ---
+    st.subheader("Engagement Metrics")
+    st.write("Top videos by views and by engagement rate.")
+    top_views = cached(youtube_top_videos, version, selected_country, 'views', limit=10)
+    top_engage = cached(youtube_top_videos, version, selected_country, 'engagement_rate', limit=10)
+    col1, col2 = st.columns(2)
+    with col1:
+        with timed('chart', 'Top Videos by Views'):
+            fig = px.bar(top_views, x='views', y='title', orientation='h',
+                        title='Top Videos by Views',
+                        labels={'title': 'Video Title', 'views': 'Views'},
+                        color='views', color_continuous_scale='Blues')
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        with timed('chart', 'Top Videos by Engagement Rate'):
+            fig = px.bar(top_engage, x='engagement_rate', y='title', orientation='h',
+                        title='Top Videos by Engagement Rate',
+                        labels={'title': 'Video Title', 'engagement_rate': 'Engagement Rate (%)'},
+                        color='engagement_rate', color_continuous_scale='Purples')
+            st.plotly_chart(fig, use_container_width=True)
+
+    # --- Engagement Rate Distribution ---
+    st.subheader("Engagement Rate Distribution")
+    st.write("Distribution of engagement rates across all videos.")
+    box_stats = cached(youtube_engagement_quantiles, version, selected_country)
+    outliers = cached(youtube_engagement_outliers, version, selected_country)
+    histogram = cached(youtube_engagement_histogram, version, selected_country)
+    col1, col2 = st.columns(2)
+    with col1:
+        with timed('chart', 'Engagement Rate Distribution'):
+            fig = go.Figure(go.Box(
+                name='Engagement Rate (%)', x=['Engagement Rate (%)'],
+                q1=box_stats['q1'], median=box_stats['median'], q3=box_stats['q3'],
+                lowerfence=box_stats['lower_fence'], upperfence=box_stats['upper_fence'],
+            ))
+            fig.add_trace(go.Scatter(
+                x=['Engagement Rate (%)'] * len(outliers), y=outliers['engagement_rate'], text=outliers['title'],
+                mode='markers', name='Outliers',
+            ))
+            fig.update_layout(title='Engagement Rate Distribution', yaxis_title='Engagement Rate (%)',
+                              showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
+        if len(box_stats) and box_stats['outlier_count'][0] > len(outliers):
+            st.caption(f"Showing {len(outliers):,} of {box_stats['outlier_count'][0]:,} outliers.")
+    with col2:
+        with timed('chart', 'Engagement Rate Histogram'):
+            fig = go.Figure(go.Bar(
+                x=(histogram['bin_start'] + histogram['bin_end']) / 2, y=histogram['video_count'],
+                width=histogram['bin_end'] - histogram['bin_start'],
+            ))
+            fig.update_layout(title='Engagement Rate Histogram (outliers excluded)',
+                              xaxis_title='Engagement Rate (%)', yaxis_title='Number of Videos', bargap=0)
+            st.plotly_chart(fig, use_container_width=True)